@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the PDF processors against the mock LLM server.
+
+Starts `mock_llm_server.py` in-process (or uses --mock-url), then runs a
+processor once per chapter PDF with the requested concurrency and reports
+end-to-end chapter throughput and tail latency.
+
+Usage:
+    python benchmark_pipeline.py tmp/cemm101.pdf tmp/cemm102.pdf --runs 20 --concurrency 4 \
+        --processor free --latency-dist lognormal --latency-mean 0.5 --latency-jitter 0.4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from mock_llm_server import add_mock_arguments, config_from_args, start_mock_server
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+PROCESSORS = {
+    "free": SCRIPT_DIR / "pdf_processor_free.py",
+    "openai": SCRIPT_DIR / "pdf_processor.py",
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def processor_env(mock_url):
+    """Environment pointing every provider at the mock server"""
+    env = dict(os.environ)
+    env["OLLAMA_URL"] = f"{mock_url}/api/generate"
+    env["OPENAI_API_BASE"] = f"{mock_url}/v1"
+    env["OPENAI_API_KEY"] = env.get("OPENAI_API_KEY") or "mock-key"
+    return env
+
+
+def run_chapter(processor, pdf_path, subject, grade, board, env, timeout):
+    """Run one processor invocation and return its timing record"""
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run(
+            [sys.executable, str(processor), str(pdf_path), subject, grade, board],
+            capture_output=True, text=True, env=env, timeout=timeout
+        )
+        elapsed = time.perf_counter() - start
+        try:
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+        except (json.JSONDecodeError, IndexError):
+            result = {"success": False, "error": proc.stderr.strip()[-500:]}
+    except subprocess.TimeoutExpired:
+        elapsed = time.perf_counter() - start
+        result = {"success": False, "error": f"timed out after {timeout}s"}
+
+    return {
+        "pdf": str(pdf_path),
+        "seconds": elapsed,
+        "success": bool(result.get("success")),
+        "tests": len(result.get("tests", [])),
+        "error": result.get("error"),
+    }
+
+
+def summarize(records, wall_seconds):
+    """Aggregate per-chapter records into throughput and latency figures"""
+    latencies = [r["seconds"] for r in records if r["success"]]
+    return {
+        "chapters": len(records),
+        "succeeded": len(latencies),
+        "failed": len(records) - len(latencies),
+        "wall_seconds": round(wall_seconds, 3),
+        "chapters_per_minute": round(len(latencies) / wall_seconds * 60, 2) if wall_seconds else 0.0,
+        "latency_p50": round(percentile(latencies, 50), 3),
+        "latency_p95": round(percentile(latencies, 95), 3),
+        "latency_p99": round(percentile(latencies, 99), 3),
+        "latency_max": round(max(latencies), 3) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF processor throughput against a mock LLM")
+    parser.add_argument("pdfs", nargs="+", help="Chapter PDFs to process (cycled to fill --runs)")
+    parser.add_argument("--processor", choices=sorted(PROCESSORS), default="free")
+    parser.add_argument("--runs", type=int, default=0, help="Total chapter runs (default: one per PDF)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Chapters processed at once")
+    parser.add_argument("--subject", default="Mathematics")
+    parser.add_argument("--grade", default="Class 3")
+    parser.add_argument("--board", default="CBSE")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Per-chapter timeout in seconds")
+    parser.add_argument("--mock-url", help="Use an already running mock server instead of starting one")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    if args.mock_url:
+        mock_url = args.mock_url.rstrip("/")
+    else:
+        server = start_mock_server(config_from_args(args))
+        host, port = server.server_address
+        mock_url = f"http://{host}:{port}"
+
+    pdfs = [Path(p) for p in args.pdfs]
+    runs = args.runs or len(pdfs)
+    jobs = [pdfs[i % len(pdfs)] for i in range(runs)]
+    env = processor_env(mock_url)
+    processor = PROCESSORS[args.processor]
+
+    print(f"🏁 Benchmarking {processor.name}: {runs} chapters, concurrency {args.concurrency}, mock {mock_url}", file=sys.stderr)
+
+    records = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [
+            executor.submit(run_chapter, processor, pdf, args.subject, args.grade, args.board, env, args.timeout)
+            for pdf in jobs
+        ]
+        for future in as_completed(futures):
+            record = future.result()
+            records.append(record)
+            status = "✅" if record["success"] else "❌"
+            print(f"{status} {Path(record['pdf']).name}: {record['seconds']:.2f}s", file=sys.stderr)
+    wall_seconds = time.perf_counter() - start
+
+    summary = summarize(records, wall_seconds)
+    if server is not None:
+        summary["mock_requests"] = server.stats["requests"]
+        summary["mock_errors"] = server.stats["errors"]
+        server.shutdown()
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print("\n📊 Benchmark summary")
+        print("=" * 40)
+        for key, value in summary.items():
+            print(f"  {key:<22} {value}")
+
+    failures = [r for r in records if not r["success"]]
+    if failures:
+        print(f"\n⚠️ First failure: {failures[0]['error']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
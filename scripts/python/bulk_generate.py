@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Bulk AI test generation across a whole textbook under provider rate limits.
+
+Every (chapter, concept) pair becomes one job for RateLimitedScheduler, so a
+14 chapter x 3 concept book runs at the highest rate the provider sustains:
+concurrency grows while calls succeed and backs off on 429 / Retry-After.
+
+Usage:
+    python bulk_generate.py tmp/cemm1*.pdf --provider openai --rpm 60 --tpm 90000 \
+        --output tmp/tests/bulk_openai_tests.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from rate_limiter import DEFAULT_LIMITS, RateLimitedScheduler
+
+
+def load_generator(provider):
+    """Import only the processor module the chosen provider needs"""
+    if provider == "openai":
+        from pdf_processor import generate_ai_questions_for_concept
+        return lambda concept, subject, grade, pdf_path, pdf_text: \
+            generate_ai_questions_for_concept(concept, subject, grade, pdf_text, 10)
+    if provider == "ollama":
+        from pdf_processor_free import generate_ollama_questions_for_concept
+        return lambda concept, subject, grade, pdf_path, pdf_text: \
+            generate_ollama_questions_for_concept(concept, subject, grade, pdf_text, 10)
+    from pdf_processor_gemini import generate_concept_questions_with_fallback
+    return lambda concept, subject, grade, pdf_path, pdf_text: \
+        generate_concept_questions_with_fallback(concept, subject, grade, str(pdf_path))
+
+
+def plan_jobs(pdf_paths, provider, subject, grade, generate):
+    """Extract each chapter once and build one job per concept"""
+    from pdf_processor_free import extract_concepts_from_text, extract_text_from_pdf, extract_title_from_pdf
+
+    jobs = []
+    for pdf_path in pdf_paths:
+        pdf_text = extract_text_from_pdf(pdf_path)
+        if not pdf_text.strip():
+            print(f"❌ No text extracted from {pdf_path}", file=sys.stderr)
+            continue
+        base_title = extract_title_from_pdf(pdf_text, subject, grade)
+        for concept in extract_concepts_from_text(pdf_text, subject):
+            jobs.append({
+                "provider": provider,
+                "fn": generate,
+                "args": (concept, subject, grade, pdf_path, pdf_text),
+                # Prompt (~4 chars/token) plus the completion budget
+                "estimated_tokens": len(pdf_text) // 4 + 4000,
+                "pdf": str(pdf_path),
+                "concept": concept,
+                "base_title": base_title,
+            })
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rate-limited bulk test generation from chapter PDFs")
+    parser.add_argument("pdfs", nargs="+", help="Chapter PDF files")
+    parser.add_argument("--provider", choices=sorted(DEFAULT_LIMITS), default="openai")
+    parser.add_argument("--subject", default="Mathematics")
+    parser.add_argument("--grade", default="Class 3")
+    parser.add_argument("--board", default="CBSE")
+    parser.add_argument("--rpm", type=int, help="Requests per minute allowed by the provider")
+    parser.add_argument("--tpm", type=int, help="Tokens per minute allowed by the provider")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="Upper bound for the AIMD window")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries per call after a 429")
+    parser.add_argument("--output", default="tmp/tests/bulk_generated_tests.json")
+    args = parser.parse_args()
+
+    limits = dict(DEFAULT_LIMITS[args.provider])
+    if args.rpm is not None:
+        limits["rpm"] = args.rpm
+    if args.tpm is not None:
+        limits["tpm"] = args.tpm
+
+    generate = load_generator(args.provider)
+    jobs = plan_jobs([Path(p) for p in args.pdfs], args.provider, args.subject, args.grade, generate)
+    print(f"📚 {len(jobs)} concept jobs across {len(args.pdfs)} chapters ({args.provider}, limits {limits})", file=sys.stderr)
+
+    def report(job, questions, error):
+        name = Path(job["pdf"]).name
+        if error:
+            print(f"❌ {name} / {job['concept']}: {error}", file=sys.stderr)
+        else:
+            print(f"✅ {name} / {job['concept']}: {len(questions)} questions", file=sys.stderr)
+
+    scheduler = RateLimitedScheduler({args.provider: limits}, max_concurrency=args.max_concurrency, max_retries=args.max_retries)
+    start = time.perf_counter()
+    outcomes = scheduler.run(jobs, on_done=report)
+    elapsed = time.perf_counter() - start
+
+    tests = []
+    for job, (questions, error) in zip(jobs, outcomes):
+        if error:
+            continue
+        tests.append({
+            "title": f"{job['base_title']} - {job['concept']}",
+            "description": f"AI-generated test focusing on {job['concept']} concepts from {job['base_title']}. Questions are based on actual PDF content and designed for {args.grade} level.",
+            "subject": args.subject,
+            "grade": args.grade,
+            "board": args.board,
+            "duration": 30,
+            "timelimit": 30,
+            "questions": questions
+        })
+
+    output_file = Path(args.output)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(tests, f, indent=2, ensure_ascii=False)
+
+    print(f"\n🎉 Generated {len(tests)}/{len(jobs)} tests in {elapsed:.1f}s")
+    print(f"📁 Saved to: {output_file}")
+    for provider, stats in scheduler.stats().items():
+        print(f"📊 {provider}: {stats}")
+
+
+if __name__ == "__main__":
+    main()
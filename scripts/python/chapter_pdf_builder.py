@@ -0,0 +1,123 @@
+"""
+Build chapter PDFs from a directory of page images (page_001.jpg, ...).
+
+Used by split_chapters.py and create_chapter_pdfs.py. Work happens in two
+parallel passes:
+
+1. every page that appears in at least one chapter range is prepared once
+   (JPEG header parsed, or other formats decoded and re-encoded into a shared
+   page cache), however many chapters include it
+2. chapters are written concurrently from the prepared pages with
+   image_pdf.PdfImageWriter, one process per chapter (chapter_pool)
+
+Per-chapter timings are printed as chapters finish.
+"""
+
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from chapter_pool import default_jobs, run_chapters
+from image_pdf import PdfImageWriter, prepare_image
+
+
+def safe_filename(chapter_name):
+    """Chapter name as a file name"""
+    return chapter_name.replace(":", "-").replace("/", "-").replace(" ", "_")
+
+
+def prepare_page(page, cache_dir):
+    """(page_num, PreparedImage or None, error) for one page; re-encoded pages go to cache_dir"""
+    page_num, page_file = page
+    try:
+        image = prepare_image(page_file)
+    except Exception as e:
+        return page_num, None, str(e)
+    if image.data is not None:
+        # Store the re-encoded page once so every chapter that includes it can copy it
+        cached = Path(cache_dir) / f"page_{page_num:03d}.jpg"
+        cached.write_bytes(image.data)
+        image.data, image.data_path = None, str(cached)
+    return page_num, image, None
+
+
+def write_chapter(index, plans, prepared, output_dir):
+    """Write chapter `index` of `plans`; returns its result dict"""
+    name, _, _, pages = plans[index]
+    start = time.perf_counter()
+    images = [prepared[page_num] for page_num in pages if prepared.get(page_num)]
+    output_pdf = Path(output_dir) / f"{safe_filename(name)}.pdf"
+    result = {"name": name, "output": None, "pages": len(images), "error": None}
+    try:
+        if images:
+            with PdfImageWriter(output_pdf) as pdf:
+                for image in images:
+                    pdf.add_prepared(image)
+            result["output"] = str(output_pdf)
+    except Exception as e:
+        result["error"] = str(e)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def build_chapter_pdfs(pages_dir, chapters, output_dir, jobs=1):
+    """
+    Build one PDF per chapter; `chapters` maps name -> (start_page, end_page).
+    Returns the per-chapter result dicts in chapter order.
+    """
+    pages_dir = Path(pages_dir)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    jobs = default_jobs() if jobs == 0 else jobs
+    started = time.perf_counter()
+
+    plans = []
+    wanted = {}
+    for name, (start_page, end_page) in chapters.items():
+        present, missing = [], []
+        for page_num in range(start_page, end_page + 1):
+            page_file = pages_dir / f"page_{page_num:03d}.jpg"
+            if page_file.exists():
+                present.append(page_num)
+                wanted[page_num] = str(page_file)
+            else:
+                missing.append(page_num)
+        plans.append((name, (start_page, end_page), missing, present))
+
+    total_refs = sum(len(plan[3]) for plan in plans)
+    print(f"📄 {len(wanted)} distinct pages for {total_refs} chapter pages, {len(plans)} chapters, {jobs} jobs")
+
+    with tempfile.TemporaryDirectory(prefix="chapter_pages_") as cache_dir:
+        prepare = partial(prepare_page, cache_dir=cache_dir)
+        pages = sorted(wanted.items())
+        if jobs > 1 and len(pages) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(pages))) as executor:
+                outcomes = list(executor.map(prepare, pages, chunksize=max(1, len(pages) // (jobs * 4))))
+        else:
+            outcomes = [prepare(page) for page in pages]
+        prepared = {}
+        for page_num, image, error in outcomes:
+            if error:
+                print(f"  ✗ Error loading page {page_num}: {error}")
+            prepared[page_num] = image
+        print(f"⏱️  Prepared pages in {time.perf_counter() - started:.2f}s")
+
+        results = {}
+        worker = partial(write_chapter, plans=plans, prepared=prepared, output_dir=output_dir)
+        for index, result in run_chapters(worker, range(len(plans)), jobs):
+            name, (start_page, end_page), missing, _ = plans[index]
+            results[index] = result
+            if missing:
+                print(f"  ⚠ {name}: missing pages {missing}")
+            if result["output"]:
+                print(f"  ✓ {name} (pages {start_page}-{end_page}): {result['pages']} pages in {result['seconds']:.2f}s")
+            elif result["error"]:
+                print(f"  ✗ {name}: error creating PDF: {result['error']}")
+            else:
+                print(f"  ✗ {name} (pages {start_page}-{end_page}): no images found")
+
+    print(f"⏱️  Built {sum(1 for r in results.values() if r['output'])}/{len(plans)} chapters "
+          f"in {time.perf_counter() - started:.2f}s")
+    return [results[index] for index in range(len(plans))]
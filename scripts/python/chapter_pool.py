@@ -0,0 +1,45 @@
+"""
+Process-pool fan-out for the per-chapter batch generators.
+
+`run_chapters` runs a top-level worker function once per chapter, across a
+ProcessPoolExecutor when jobs > 1, and yields results as chapters finish so
+callers can report progress. Callers merge with `in_chapter_order` so the
+combined output is identical to a serial run.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+def default_jobs():
+    """Worker count used for `--jobs 0` (one per CPU)"""
+    return os.cpu_count() or 1
+
+
+def run_chapters(worker, chapter_nums, jobs=1):
+    """Yield (chapter_num, result) for worker(chapter_num), in completion order"""
+    chapter_nums = list(chapter_nums)
+    jobs = default_jobs() if jobs == 0 else jobs
+    if jobs <= 1 or len(chapter_nums) <= 1:
+        for chapter_num in chapter_nums:
+            yield chapter_num, worker(chapter_num)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(chapter_nums))) as executor:
+        futures = {executor.submit(worker, chapter_num): chapter_num for chapter_num in chapter_nums}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def in_chapter_order(results):
+    """Flatten a {chapter_num: [tests]} mapping into one list ordered by chapter"""
+    ordered = []
+    for chapter_num in sorted(results):
+        ordered.extend(results[chapter_num] or [])
+    return ordered
+
+
+def add_jobs_argument(parser):
+    """Register the shared --jobs option"""
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Chapters to process in parallel (0 = one per CPU)")
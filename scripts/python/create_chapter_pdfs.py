@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 
+import argparse
 from PIL import Image
 from pathlib import Path
 import json
 
+from chapter_pdf_builder import build_chapter_pdfs
+from chapter_pool import add_jobs_argument
+
 def show_page_10():
     """Display page 10 for reference"""
     page_10 = Path("./tmp/viva_class5_pages/page_010.jpg")
@@ -64,56 +68,11 @@ def save_chapters_to_file(chapters):
         json.dump(data, f, indent=2)
     print(f"\n✓ Chapter definitions saved to: {chapters_file}")
 
-def create_chapter_pdf(pages_dir, chapter_name, start_page, end_page, output_dir):
-    """Create a PDF from a range of pages"""
-    pages_dir = Path(pages_dir)
-    output_dir = Path(output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Sanitize chapter name for filename
-    safe_name = chapter_name.replace(":", "-").replace("/", "-").replace(" ", "_")
-    output_pdf = output_dir / f"{safe_name}.pdf"
-    
-    print(f"\n  Creating: {chapter_name} (pages {start_page}-{end_page})")
-    
-    # Collect images for this chapter
-    images = []
-    
-    for page_num in range(start_page, end_page + 1):
-        page_file = pages_dir / f"page_{page_num:03d}.jpg"
-        
-        if not page_file.exists():
-            continue
-        
-        try:
-            img = Image.open(page_file)
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            images.append(img)
-        except Exception as e:
-            print(f"    ✗ Error loading page {page_num}: {e}")
-    
-    if not images:
-        print(f"    ✗ No images found")
-        return False
-    
-    # Create PDF
-    try:
-        images[0].save(
-            output_pdf,
-            save_all=True,
-            append_images=images[1:] if len(images) > 1 else [],
-            resolution=100.0,
-            quality=95,
-            optimize=True
-        )
-        print(f"    ✓ Created: {output_pdf.name} ({len(images)} pages)")
-        return True
-    except Exception as e:
-        print(f"    ✗ Error creating PDF: {e}")
-        return False
-
 def main():
+    parser = argparse.ArgumentParser(description="Create chapter PDFs from tmp/chapters_class5.json")
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+    
     pages_dir = "./tmp/viva_class5_pages"
     output_dir = "./tmp/class5_chapters"
     
@@ -140,10 +99,8 @@ def main():
     print(f"Creating {len(chapters)} chapter PDFs...")
     print("=" * 70)
     
-    success_count = 0
-    for chapter_name, (start_page, end_page) in chapters.items():
-        if create_chapter_pdf(pages_dir, chapter_name, start_page, end_page, output_dir):
-            success_count += 1
+    results = build_chapter_pdfs(pages_dir, chapters, output_dir, args.jobs)
+    success_count = sum(1 for result in results if result["output"])
     
     print("\n" + "=" * 70)
     print(f"✓ Successfully created {success_count}/{len(chapters)} chapter PDFs")
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import argparse
 import json
 import sys
 import os
@@ -7,8 +8,7 @@ import os
 # Add the project root to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-# Import the test service
-from lib.database import testService
+from ingest_client import IngestClient
 
 def create_module_tests():
     """Create two tests based on Module 1 Study Guide content"""
@@ -259,25 +259,18 @@ def create_module_tests():
     
     return [test1, test2]
 
-def add_tests_to_database():
+def add_tests_to_database(dsn=None, dry_run=False):
     """Add the created tests to the database"""
     try:
         tests = create_module_tests()
         
-        for i, test_data in enumerate(tests, 1):
-            print(f"Adding Test {i}: {test_data['title']}")
-            
-            # Add the test to the database
-            test_id = testService.addTest(
-                title=test_data['title'],
-                description=test_data['description'],
-                subject=test_data['subject'],
-                grade=test_data['grade'],
-                board=test_data['board'],
-                duration=test_data['duration'],
-                questions=test_data['questions']
-            )
-            
+        # One batched insert for all tests instead of one call per test
+        with IngestClient(dsn, dry_run=dry_run) as client:
+            test_ids = client.add_tests(tests)
+        if dry_run:
+            return True
+        
+        for i, (test_data, test_id) in enumerate(zip(tests, test_ids), 1):
             print(f"✅ Test {i} added successfully with ID: {test_id}")
             print(f"   - {len(test_data['questions'])} questions")
             print(f"   - Duration: {test_data['duration']} minutes")
@@ -302,13 +295,17 @@ def add_tests_to_database():
     return True
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the Module 1 study guide tests and add them to the database")
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL"), help="Postgres connection string (default: $DATABASE_URL)")
+    parser.add_argument("--dry-run", action="store_true", help="Validate the tests without writing to the database")
+    args = parser.parse_args()
+    
     print("Creating Module 1 Study Guide Tests...")
     print("=" * 50)
     
-    success = add_tests_to_database()
+    success = add_tests_to_database(args.dsn, args.dry_run)
     
     if success:
         print("\n✅ All tests created and added successfully!")
     else:
         print("\n❌ Failed to create tests. Please check the error messages above.")
-
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Content-hash delta import for generated tests.
+
+Every test gets a stable content hash over its title, grade, board, subject
+and questions (question ids assigned by the database are ignored). The
+planner compares generated files with the current tests table, or with a
+backup snapshot, and emits only what changed:
+
+- unchanged: a row with the same content hash already exists
+- update:    a row with the same title/grade/board/subject exists but its
+             questions differ (rewritten in place, keeping the row id)
+- insert:    nothing matches
+- delete:    with --delete-stale only, existing rows with the same
+             title/grade/board/subject as a generated test that no generated
+             test matched, i.e. duplicates from earlier re-runs
+
+Deleting a test cascades to its results, progress and reports, so deletes
+are opt-in and never reach a row whose title is not in the generated files.
+
+Usage:
+    python delta_import.py all_class3_math_tests.json --backup backups/tests_backup_2025-10-16_03-06-53-113Z.json
+    python delta_import.py tmp/tests/*.json --dsn "$DATABASE_URL" --output tmp/delta.sql [--apply] [--delete-stale]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+from question_dedup import iter_tests
+from schema_validator import locate_tests
+from sql_statements import TEST_COLUMNS, insert_statements, sql_literal
+
+# Question fields that are content; ids and similar are assigned per import (also used by question_store)
+QUESTION_FIELDS = ("question", "options", "correctAnswer", "explanation", "image")
+
+
+def _clean(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+def test_key(test):
+    """Natural identity of a test across runs"""
+    return tuple(_clean(test.get(field) or "") for field in ("subject", "grade", "board", "title"))
+
+
+def content_hash(test):
+    """Stable SHA-256 over title, grade, board, subject and question content"""
+    questions = [
+        {field: _clean(question.get(field)) for field in QUESTION_FIELDS if question.get(field) is not None}
+        for question in test.get("questions", [])
+    ]
+    payload = {
+        "title": _clean(test.get("title") or ""),
+        "grade": _clean(test.get("grade") or ""),
+        "board": _clean(test.get("board") or ""),
+        "subject": _clean(test.get("subject") or ""),
+        "questions": questions,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def with_board(test, default_board):
+    """The test with `default_board` filled in where it has none (same rule for both sides of the delta)"""
+    return test if test.get("board") else dict(test, board=default_board)
+
+
+def load_generated(paths, default_board="CBSE"):
+    """Generated tests from all files, with a board filled in where missing"""
+    tests = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for test in iter_tests(json.load(f)):
+                tests.append(with_board(test, default_board))
+    return tests
+
+
+def load_backup_rows(path, default_board="CBSE"):
+    """Existing rows from any tests or full backup shape schema_validator.locate_tests knows"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    located = locate_tests(data)
+    if located is None:
+        raise ValueError(f"{path} holds no tests")
+    rows, _ = located
+    if isinstance(rows, dict):
+        rows = [rows]
+    return [with_board(row, default_board) for row in rows if isinstance(row, dict) and row.get("id")]
+
+
+def fetch_database_rows(dsn, default_board="CBSE"):
+    """Existing rows straight from the tests table"""
+    try:
+        import psycopg2
+    except ImportError:
+        raise Exception("psycopg2 is required to read the database: pip install psycopg2-binary")
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT id, title, subject, grade, board, questions FROM tests")
+            columns = [column.name for column in cursor.description]
+            return [with_board(dict(zip(columns, row), id=str(row[0])), default_board) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def plan_delta(generated, existing, delete_stale=False):
+    """Return {"insert": [...], "update": [(row_id, test)], "delete": [row_ids], "unchanged": n}"""
+    by_hash = {}
+    by_key = {}
+    for row in existing:
+        by_hash.setdefault(content_hash(row), []).append(row)
+        by_key.setdefault(test_key(row), []).append(row)
+
+    matched = set()
+
+    def take(rows):
+        for row in rows or ():
+            if row["id"] not in matched:
+                matched.add(row["id"])
+                return row
+        return None
+
+    plan = {"insert": [], "update": [], "delete": [], "unchanged": 0}
+    changed = []
+    # Exact content matches first, so a changed test never claims an unchanged row
+    for test in generated:
+        if take(by_hash.get(content_hash(test))):
+            plan["unchanged"] += 1
+        else:
+            changed.append(test)
+
+    for test in changed:
+        row = take(by_key.get(test_key(test)))
+        if row:
+            plan["update"].append((row["id"], test))
+        else:
+            plan["insert"].append(test)
+
+    if delete_stale:
+        # Only leftover copies of a generated test; other tests in the group are kept
+        keys = {test_key(test) for test in generated}
+        plan["delete"] = [row["id"] for row in existing
+                          if row["id"] not in matched and test_key(row) in keys]
+    return plan
+
+
+def delta_sql(plan, columns=TEST_COLUMNS, batch_size=100):
+    """SQL for a plan, as one transaction"""
+    lines = ["BEGIN;", ""]
+    if plan["delete"]:
+        lines.append(f"-- Delete {len(plan['delete'])} duplicate tests")
+        ids = ", ".join(sql_literal(row_id) for row_id in plan["delete"])
+        lines.append(f"DELETE FROM tests WHERE id IN ({ids});")
+        lines.append("")
+    for row_id, test in plan["update"]:
+        lines.append(f"-- Update: {test['title']}")
+        lines.append(
+            "UPDATE tests SET "
+            f"description = {sql_literal(test.get('description', ''))}, "
+            f"timelimit = {sql_literal(test.get('duration', test.get('timelimit')))}, "
+            f"questions = {sql_literal(json.dumps(test['questions']))}, "
+            f"updatedat = NOW() WHERE id = {sql_literal(row_id)};"
+        )
+    if plan["update"]:
+        lines.append("")
+    for statement in insert_statements(plan["insert"], columns, batch_size):
+        lines.append(statement)
+        lines.append("")
+    lines.append("COMMIT;")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan and emit only the inserts, updates and deletes needed to import generated tests")
+    parser.add_argument("files", nargs="+", help="Generated test JSON files")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--backup", help="Compare with a tests or full backup JSON snapshot")
+    source.add_argument("--dsn", help="Compare with the live tests table (e.g. $DATABASE_URL)")
+    parser.add_argument("--output", default="tmp/delta_import.sql", help="Where to write the delta SQL")
+    parser.add_argument("--delete-stale", action="store_true",
+                        help="Delete duplicate rows of generated tests (cascades to their results)")
+    parser.add_argument("--default-board", default="CBSE", help="Board for generated tests and existing rows that do not set one")
+    parser.add_argument("--batch-size", type=int, default=100, help="Rows per INSERT statement")
+    parser.add_argument("--apply", action="store_true", help="Run the delta against --dsn in one transaction")
+    args = parser.parse_args()
+
+    if args.apply and not args.dsn:
+        parser.error("--apply needs --dsn")
+
+    generated = load_generated(args.files, args.default_board)
+    if args.backup:
+        existing = load_backup_rows(args.backup, args.default_board)
+    else:
+        existing = fetch_database_rows(args.dsn, args.default_board)
+    plan = plan_delta(generated, existing, delete_stale=args.delete_stale)
+
+    print(f"📊 {len(generated)} generated tests vs {len(existing)} existing rows")
+    print(f"   ✅ unchanged: {plan['unchanged']}")
+    print(f"   ➕ insert:    {len(plan['insert'])}")
+    print(f"   ✏️  update:    {len(plan['update'])}")
+    print(f"   🗑️  delete:    {len(plan['delete'])}")
+
+    sql_lines = delta_sql(plan, batch_size=args.batch_size)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write("\n".join(sql_lines) + "\n")
+    print(f"📁 Delta SQL saved to: {args.output}")
+
+    if args.apply:
+        import psycopg2
+        conn = psycopg2.connect(args.dsn)
+        try:
+            with conn:
+                with conn.cursor() as cursor:
+                    # BEGIN/COMMIT come from the connection's transaction
+                    cursor.execute("\n".join(sql_lines[1:-1]))
+        finally:
+            conn.close()
+        print("✅ Delta applied")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,24 @@ import requests
 from pathlib import Path
 import sys
 import re
+import shutil
 from bs4 import BeautifulSoup
 
-def download_ebook(url, output_path):
+from http_cache import HttpCache
+
+def print_progress(done, total):
+    """Single-line byte counter for a streamed download"""
+    if total:
+        print(f"\r  {done / 1048576:.1f} / {total / 1048576:.1f} MB ({done * 100 // total}%)", end="", flush=True)
+    else:
+        print(f"\r  {done / 1048576:.1f} MB", end="", flush=True)
+    if total and done >= total:
+        print()
+
+def download_ebook(url, output_path, cache_dir="./tmp/http_cache"):
     """
-    Attempt to download an ebook from Viva Digital
+    Attempt to download an ebook from Viva Digital. Responses go through an
+    on-disk HTTP cache, so a repeat run only sends conditional GETs.
     """
     try:
         print(f"Attempting to download from: {url}")
@@ -21,17 +34,22 @@ def download_ebook(url, output_path):
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
         
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
+        session = requests.Session()
+        session.headers.update(headers)
+        cache = HttpCache(cache_dir, session)
+        
+        response = cache.fetch(url)
+        if not response.ok:
+            print(f"Error downloading: HTTP {response.status_code}")
+            return False
         
         # Check content type
-        content_type = response.headers.get('content-type', '')
-        print(f"Content type: {content_type}")
+        content_type = response.content_type
+        print(f"Content type: {content_type}{' (unchanged, from cache)' if response.from_cache else ''}")
         
         if 'application/pdf' in content_type:
-            # It's a PDF, save it directly
-            with open(output_path, 'wb') as f:
-                f.write(response.content)
+            # It's a PDF, copy the cached body to the output path
+            shutil.copyfile(response.path, output_path)
             print(f"✓ PDF downloaded successfully to: {output_path}")
             return True
         elif 'text/html' in content_type:
@@ -64,12 +82,16 @@ def download_ebook(url, output_path):
                     first_link = urljoin(url, first_link)
                 
                 print(f"\n⟳ Attempting to download: {first_link}")
-                pdf_response = requests.get(first_link, headers=headers, timeout=30)
-                pdf_response.raise_for_status()
+                pdf_response = cache.fetch(first_link, dest=output_path, progress=print_progress)
+                if not pdf_response.ok:
+                    print(f"Error downloading: HTTP {pdf_response.status_code}")
+                    return False
                 
-                with open(output_path, 'wb') as f:
-                    f.write(pdf_response.content)
-                print(f"✓ PDF downloaded successfully to: {output_path}")
+                if pdf_response.from_cache:
+                    print(f"✓ PDF unchanged since the last run: {output_path}")
+                else:
+                    print(f"✓ PDF downloaded successfully to: {output_path}")
+                print(f"📦 HTTP cache: {cache.summary()}")
                 return True
             
             # Look for image-based ebook viewers
@@ -1,121 +1,243 @@
 #!/usr/bin/env python3
 
+import argparse
 import requests
 from pathlib import Path
-import sys
 import json
-from PIL import Image
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
-def get_page_count(base_url):
-    """Try to determine the total page count"""
-    config_url = f"{base_url}/mobile/javascript/config.js"
-    try:
-        response = requests.get(config_url, timeout=10)
-        # Try to find totalPageCount in the response
-        # We'll need to check the actual pages
+from http_cache import HttpCache
+from image_pdf import images_to_pdf as write_images_pdf
+
+# Filename formats and directories the viewer has been seen to use
+PAGE_FORMATS = ["{page}.jpg", "{page:03d}.jpg", "{page}.png", "page{page}.jpg"]
+PATH_TYPES = ["files/mobile", "files/large", "files/page"]
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+def get_session(pool_size=8):
+    """Session with keep-alive connections for `pool_size` concurrent downloads"""
+    from requests.adapters import HTTPAdapter
+    
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def candidate_templates(base_url):
+    """Every URL template to try, most common first; fill with .format(page=n)"""
+    return [f"{base_url}/{path_type}/{page_format}" for page_format in PAGE_FORMATS for path_type in PATH_TYPES]
+
+def discover_url_template(session, base_url, page_num=1, preferred=None):
+    """
+    Find the URL template that serves `page_num` (HEAD probes, `preferred`
+    first); None if every candidate reports the page missing. Raises the last probe
+    error if no candidate serves the page but some could not be checked.
+    """
+    templates = candidate_templates(base_url)
+    if preferred in templates:
+        templates.remove(preferred)
+        templates.insert(0, preferred)
+    error = None
+    for template in templates:
+        try:
+            if page_exists(session, template, page_num):
+                return template
+        except requests.RequestException as e:
+            error = e
+    if error is not None:
+        raise error
+    return None
+
+HTTP_CACHE_DIR = "./tmp/http_cache"
+
+# Page counts found by get_page_count, per book URL (also kept in memory for the run)
+PAGE_COUNT_CACHE = Path("./tmp/viva_page_counts.json")
+_page_counts = {}
+
+# Only these mean "no such page" (S3 answers 403 for a missing key when listing
+# is not allowed); other statuses and request errors are raised
+MISSING_STATUSES = (403, 404, 410)
+# Worth asking again before giving up
+TRANSIENT_STATUSES = (429, 500, 502, 503, 504)
+
+def page_exists(session, template, page_num, retries=3):
+    """
+    HEAD a page; servers that refuse HEAD get a streamed GET that is closed
+    unread. True for 200, False for 403/404/410. Timeouts, connection errors and
+    5xx/429 are retried with backoff; anything still failing is raised.
+    """
+    url = template.format(page=page_num)
+    for attempt in range(retries + 1):
+        try:
+            response = session.head(url, timeout=10, allow_redirects=True)
+            if response.status_code in (405, 501):
+                response = session.get(url, timeout=10, stream=True)
+                response.close()
+            if response.status_code == 200:
+                return True
+            if response.status_code in MISSING_STATUSES:
+                return False
+            error = requests.HTTPError(f"{response.status_code} for {url}", response=response)
+            if response.status_code not in TRANSIENT_STATUSES:
+                raise error
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        if attempt == retries:
+            raise error
+        time.sleep(0.5 * 2 ** attempt)
+
+def load_page_counts():
+    if not _page_counts and PAGE_COUNT_CACHE.exists():
+        try:
+            _page_counts.update(json.loads(PAGE_COUNT_CACHE.read_text()))
+        except (OSError, ValueError):
+            pass
+    return _page_counts
+
+def get_page_count(base_url, session=None, template=None, max_pages=2000, refresh=False):
+    """
+    Total page count: HEAD pages 1, 2, 4, 8, ... until one is missing, then
+    binary-search between the last page found and the first one missing.
+    Every probe uses the layout that serves page 1, so a count takes about
+    2*log2(pages) requests (a book that switches layout part-way through is
+    counted up to the switch). Probe
+    errors are raised rather than read as missing, so only a clean count is
+    cached per book URL. None if page 1 cannot be found.
+    """
+    counts = load_page_counts()
+    if not refresh and base_url in counts:
+        return counts[base_url]
+    
+    session = session or get_session()
+    template = discover_url_template(session, base_url, 1, template)
+    if template is None:
         return None
-    except:
+    
+    def exists(page_num):
+        return page_exists(session, template, page_num)
+    
+    # Exponential probe: `found` exists, `missing` does not
+    found, missing = 1, 2
+    while missing <= max_pages and exists(missing):
+        found, missing = missing, missing * 2
+    if missing > max_pages:
+        if exists(max_pages):
+            found = max_pages
+        missing = max_pages + 1
+    
+    # Binary search for the last page in (found, missing)
+    while missing - found > 1:
+        middle = (found + missing) // 2
+        if exists(middle):
+            found = middle
+        else:
+            missing = middle
+    
+    counts[base_url] = found
+    try:
+        PAGE_COUNT_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        PAGE_COUNT_CACHE.write_text(json.dumps(counts, indent=2))
+    except OSError:
+        pass
+    return found
+
+def download_page(cache, template, page_num, output_dir):
+    """Fetch one page through the HTTP cache; returns the saved path or None"""
+    output_file = output_dir / f"page_{page_num:03d}.jpg"
+    try:
+        response = cache.fetch(template.format(page=page_num), dest=output_file)
+    except (requests.RequestException, OSError):
+        # OSError covers a truncated body (stream_to_file) or a failed write
         return None
+    return output_file if response.ok else None
 
-def download_page_images(base_url, output_dir, max_pages=500):
-    """Download all page images from the ebook"""
+def download_page_images(base_url, output_dir, max_pages=500, workers=8, refresh=False, revalidate=False, verify=False):
+    """
+    Download all page images from the ebook. Pages already saved by an earlier
+    (possibly interrupted) run are skipped; with `revalidate` they are checked
+    with conditional GETs instead, and `verify` also compares their sha256.
+    """
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Construct page URLs (they're usually numbered 1.jpg, 2.jpg, etc.)
-    page_urls = []
-    downloaded_pages = []
-    
     print(f"Downloading pages from: {base_url}")
     print(f"Saving to: {output_dir}")
     print("=" * 60)
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
-    
-    # Try downloading pages until we get a 404
-    for page_num in range(1, max_pages + 1):
-        # Try different formats: 1.jpg, 001.jpg, page1.jpg, etc.
-        formats_to_try = [
-            f"{page_num}.jpg",
-            f"{page_num:03d}.jpg",
-            f"{page_num}.png",
-            f"page{page_num}.jpg",
-        ]
-        
-        page_downloaded = False
-        for page_format in formats_to_try:
-            # Try both normal and large paths
-            for path_type in ['files/mobile', 'files/large', 'files/page']:
-                page_url = f"{base_url}/{path_type}/{page_format}"
-                
+    session = get_session(workers)
+    cache = HttpCache(HTTP_CACHE_DIR, session, revalidate=revalidate, verify=verify)
+    
+    # Probe the formats once; pages are fetched with this layout and re-probed only if one fails
+    try:
+        template = discover_url_template(session, base_url)
+        # Knowing the total lets every page be queued at once
+        total = get_page_count(base_url, session, template, max_pages, refresh) if template else None
+    except requests.RequestException as e:
+        print(f"✗ Could not probe the book's pages: {e}")
+        return []
+    if template is None or not total:
+        print("✗ Could not download page 1. Check the URL structure.")
+        return []
+    print(f"✓ Page URL pattern: {template}")
+    print(f"✓ Book has {total} pages")
+    
+    downloaded_pages = []
+    pages = range(1, total + 1)
+    fetch = partial(download_page, cache, template, output_dir=output_dir)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for page_num, output_file in zip(pages, executor.map(fetch, pages)):
+            if output_file is None:
+                # The layout may change part-way through a book
                 try:
-                    response = requests.get(page_url, headers=headers, timeout=10)
-                    if response.status_code == 200:
-                        # Save the page
-                        output_file = output_dir / f"page_{page_num:03d}.jpg"
-                        with open(output_file, 'wb') as f:
-                            f.write(response.content)
-                        
-                        downloaded_pages.append(output_file)
-                        print(f"✓ Downloaded page {page_num}")
-                        page_downloaded = True
-                        break
-                    
-                except Exception as e:
-                    continue
-            
-            if page_downloaded:
-                break
-        
-        # If we couldn't download this page, assume we've reached the end
-        if not page_downloaded:
-            if page_num == 1:
-                print(f"✗ Could not download page 1. Check the URL structure.")
-            else:
-                print(f"\nReached end at page {page_num - 1}")
-            break
+                    fallback = discover_url_template(session, base_url, page_num, template)
+                except requests.RequestException:
+                    fallback = None
+                if fallback:
+                    output_file = download_page(cache, fallback, page_num, output_dir)
+            if output_file is None:
+                print(f"✗ Failed to download page {page_num}")
+                continue
+            downloaded_pages.append(output_file)
+            print(f"✓ Downloaded page {page_num}")
     
+    print(f"\n📦 HTTP cache: {cache.summary()}")
     return downloaded_pages
 
 def images_to_pdf(image_files, output_pdf):
-    """Convert downloaded images to a single PDF"""
+    """Convert downloaded images to a single PDF (JPEG pages are embedded without re-encoding)"""
     if not image_files:
         print("No images to convert")
         return False
     
     try:
-        # Open all images
-        images = []
-        for img_file in image_files:
-            img = Image.open(img_file)
-            # Convert to RGB if necessary
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            images.append(img)
-        
-        # Save as PDF
-        if images:
-            images[0].save(
-                output_pdf,
-                save_all=True,
-                append_images=images[1:],
-                resolution=100.0,
-                quality=95,
-                optimize=True
-            )
-            print(f"\n✓ Created PDF: {output_pdf}")
-            return True
+        page_count = write_images_pdf(image_files, output_pdf)
+        print(f"\n✓ Created PDF: {output_pdf} ({page_count} pages)")
+        return True
     except Exception as e:
         print(f"✗ Error creating PDF: {e}")
         return False
 
 def main():
     # Parse command line arguments
-    if len(sys.argv) > 1:
-        base_url = sys.argv[1]
+    parser = argparse.ArgumentParser(description="Download Viva ebook page images and combine them into a PDF")
+    parser.add_argument("base_url", nargs="?", help="Ebook base URL (default: ICSE Class 5 Math)")
+    parser.add_argument("class_num", nargs="?", help="Pass 4 to download the Class 4 book")
+    parser.add_argument("--workers", type=int, default=8, help="Pages downloaded in parallel")
+    parser.add_argument("--recount", action="store_true", help="Ignore the cached page count for this book")
+    parser.add_argument("--revalidate", action="store_true", help="Check already-downloaded pages with conditional GETs")
+    parser.add_argument("--verify", action="store_true", help="Re-download saved pages whose sha256 does not match")
+    args = parser.parse_args()
+    
+    if args.base_url:
+        base_url = args.base_url.rstrip("/")
         # Extract class number for output naming
         class_match = re.search(r'c(\d+)', base_url)
         class_num = class_match.group(1) if class_match else '5'
@@ -125,7 +247,7 @@ def main():
         class_num = "5"
     
     # Check if we want Class 4 instead
-    if len(sys.argv) > 2 and sys.argv[2] == '4':
+    if args.class_num == '4':
         base_url = "https://trp.vivadigitalindia.net/math/icse/c4/ebook"
         class_num = "4"
     
@@ -137,7 +259,8 @@ def main():
     print("=" * 60)
     
     # Download all pages
-    downloaded_pages = download_page_images(base_url, output_dir)
+    downloaded_pages = download_page_images(base_url, output_dir, workers=args.workers, refresh=args.recount,
+                                            revalidate=args.revalidate, verify=args.verify)
     
     if not downloaded_pages:
         print("\n✗ No pages were downloaded. The URL structure might be different.")
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Flatten test banks into two Parquet tables for analytics.
+
+- tests.parquet:     one row per test (id, title, subject, grade, board,
+                     timelimit, question count, source file, ...)
+- questions.parquet: one row per question (test id, position, text, options,
+                     answer index, explanation) with subject/grade/board
+                     repeated so most queries need no join
+
+subject, grade, board, type and source_file are written with Parquet
+dictionary encoding (pass read_dictionary=[...] to pyarrow to get them back
+as categoricals); free-text columns are not. Input is streamed with
+json_stream and written in row groups, so memory stays bounded by
+--row-group-size rather than the size of the bank.
+
+Usage:
+    python export_parquet.py backups/tests_backup_*.json tmp/tests/*.json --output-dir tmp/parquet
+
+Inputs can be test banks, tests backups or full backups (see json_stream).
+
+Example query (DuckDB):
+    SELECT grade, avg(len(options)) FROM 'tmp/parquet/questions.parquet' GROUP BY grade;
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+from json_stream import iter_tests_stream
+
+DICTIONARY_COLUMNS = ["source_file", "subject", "grade", "board", "type"]
+
+
+def _schemas(pa):
+    category = pa.string()  # dictionary-encoded on write, see DICTIONARY_COLUMNS
+    tests = pa.schema([
+        ("test_id", pa.string()),
+        ("source_file", category),
+        ("title", pa.string()),
+        ("description", pa.string()),
+        ("subject", category),
+        ("grade", category),
+        ("board", category),
+        ("type", category),
+        ("timelimit", pa.int32()),
+        ("question_count", pa.int32()),
+        ("created_at", pa.string()),
+    ])
+    questions = pa.schema([
+        ("test_id", pa.string()),
+        ("position", pa.int16()),
+        ("question_id", pa.string()),
+        ("subject", category),
+        ("grade", category),
+        ("board", category),
+        ("question", pa.string()),
+        ("options", pa.list_(pa.string())),
+        ("correct_answer", pa.int8()),
+        ("explanation", pa.string()),
+        ("image", pa.string()),
+    ])
+    return tests, questions
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def flatten(path, tests):
+    """Yield (test_row, [question_rows]) for every test in a stream"""
+    source = Path(path).name
+    for index, test in enumerate(tests):
+        test_id = str(test.get("id") or f"{source}#{index}")
+        questions = test.get("questions", [])
+        test_row = {
+            "test_id": test_id,
+            "source_file": source,
+            "title": test.get("title"),
+            "description": test.get("description"),
+            "subject": test.get("subject"),
+            "grade": test.get("grade"),
+            "board": test.get("board"),
+            "type": test.get("type"),
+            "timelimit": _int_or_none(test.get("timelimit", test.get("duration"))),
+            "question_count": len(questions),
+            "created_at": test.get("createdat") or test.get("created_at"),
+        }
+        question_rows = []
+        for position, question in enumerate(questions):
+            question_rows.append({
+                "test_id": test_id,
+                "position": position,
+                "question_id": None if question.get("id") is None else str(question.get("id")),
+                "subject": test_row["subject"],
+                "grade": test_row["grade"],
+                "board": test_row["board"],
+                "question": question.get("question"),
+                "options": [str(option) for option in question.get("options", [])],
+                "correct_answer": _int_or_none(question.get("correctAnswer")),
+                "explanation": question.get("explanation"),
+                "image": question.get("image"),
+            })
+        yield test_row, question_rows
+
+
+class ParquetTableWriter:
+    """Buffers rows and writes them as row groups of a fixed size"""
+
+    def __init__(self, pa, pq, path, schema, row_group_size, compression):
+        self.pa = pa
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.rows = []
+        self.count = 0
+        dictionary_columns = [name for name in DICTIONARY_COLUMNS if name in schema.names]
+        self.writer = pq.ParquetWriter(path, schema, compression=compression, use_dictionary=dictionary_columns)
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        table = self.pa.Table.from_pylist(self.rows, schema=self.schema)
+        self.writer.write_table(table)
+        self.count += len(self.rows)
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def export(paths, output_dir, row_group_size=10000, compression="zstd"):
+    """
+    Write tests.parquet and questions.parquet; returns (test_count, question_count).
+    Inputs without tests are reported; ValueError if no input has any.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise Exception("pyarrow is required for Parquet export: pip install pyarrow")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tests_schema, questions_schema = _schemas(pa)
+    tests_out = ParquetTableWriter(pa, pq, output_dir / "tests.parquet", tests_schema, row_group_size, compression)
+    questions_out = ParquetTableWriter(pa, pq, output_dir / "questions.parquet", questions_schema, row_group_size, compression)
+    empty = []
+    try:
+        for path in paths:
+            found = 0
+            for test_row, question_rows in flatten(path, iter_tests_stream(path)):
+                found += 1
+                tests_out.add(test_row)
+                for question_row in question_rows:
+                    questions_out.add(question_row)
+            if not found:
+                empty.append(path)
+                print(f"⚠️  No tests found in {path} (not a test bank or tests backup?)", file=sys.stderr)
+    finally:
+        tests_out.close()
+        questions_out.close()
+    if empty and len(empty) == len(paths):
+        raise ValueError("none of the input files contain tests")
+    return tests_out.count, questions_out.count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export test banks to Parquet (tests + questions tables)")
+    parser.add_argument("files", nargs="+", help="Test bank or tests backup JSON files")
+    parser.add_argument("--output-dir", default="tmp/parquet", help="Directory for tests.parquet and questions.parquet")
+    parser.add_argument("--row-group-size", type=int, default=10000, help="Rows buffered per Parquet row group")
+    parser.add_argument("--compression", default="zstd", choices=("zstd", "snappy", "gzip", "none"))
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        tests, questions = export(args.files, args.output_dir, args.row_group_size, args.compression)
+    except Exception as e:
+        print(f"❌ Parquet export failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Exported {tests} tests and {questions} questions in {elapsed:.2f}s")
+    for name in ("tests.parquet", "questions.parquet"):
+        path = os.path.join(args.output_dir, name)
+        print(f"📁 {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
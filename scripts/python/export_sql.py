@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Single-pass SQL exporter for generated test banks.
+
+Tests are streamed from the input with json_stream and each statement is
+written straight to every sink (stdout and/or files) as it is produced, so
+memory stays flat no matter how large the input is. Totals are only known
+at the end and are written as a closing comment.
+
+Presets reproduce the older per-bank scripts (generate_sql_import.py,
+generate_corrected_sql.py, generate_class3_sql.py), which are now thin
+wrappers around this module:
+
+    python export_sql.py --preset class3 --format copy
+    python export_sql.py tmp/tests/all_chapter_tests_from_pdfs.json --schema no-board \
+        --grade "Class 3" --output - --output tmp/class3.sql
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+from json_stream import iter_tests_stream
+from schema_validator import check_tests
+from sql_statements import DEFAULT_BATCH_SIZE, TEST_COLUMNS, TEST_COLUMNS_NO_BOARD, add_export_arguments, export_lines
+
+SCHEMAS = {
+    "board": TEST_COLUMNS,
+    "no-board": TEST_COLUMNS_NO_BOARD,
+}
+
+PRESETS = {
+    "grade4": {
+        "input": "all_grade4_math_tests.json",
+        "outputs": ["-", "import_grade4_math_tests.sql"],
+        "label": "Grade 4 Math Tests from PDF",
+        "grade": "Grade 4",
+        "schema": "board",
+        "board": "US",
+        "source_script": "create_pdf_tests.py",
+    },
+    "grade4-corrected": {
+        "input": "all_grade4_math_tests.json",
+        "outputs": ["-"],
+        "label": "Grade 4 Math Tests from PDF",
+        "grade": "Grade 4",
+        "schema": "no-board",
+        "board": None,
+        "source_script": "create_pdf_tests.py",
+    },
+    "class3": {
+        "input": "all_class3_math_tests.json",
+        "outputs": ["-", "import_class3_math_tests.sql"],
+        "label": "Class 3 Math Tests from Chapter 1",
+        "grade": "Class 3",
+        "schema": "no-board",
+        "board": None,
+        "source_script": "create_class3_tests.py",
+    },
+}
+
+
+class Sinks:
+    """
+    Fan each write out to several text outputs ("-" is stdout). Files are
+    written to a temp file next to the target and renamed into place only
+    when the block finishes without an error, so a failed export never
+    leaves a half-written script at the destination.
+    """
+
+    def __init__(self, targets):
+        self.targets = list(targets)
+        self.files = []
+        # (open temp file, temp path, final path)
+        self.opened = []
+        try:
+            for target in self.targets:
+                if target == "-":
+                    self.files.append(sys.stdout)
+                    continue
+                directory = os.path.dirname(target) or "."
+                fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(target)}.", suffix=".tmp")
+                f = os.fdopen(fd, "w", encoding="utf-8")
+                self.files.append(f)
+                self.opened.append((f, tmp_path, target))
+        except BaseException:
+            self.abort()
+            raise
+
+    def write_line(self, line):
+        for f in self.files:
+            f.write(line + "\n")
+
+    def close(self):
+        """Finish every file and move it into place"""
+        umask = os.umask(0)
+        os.umask(umask)
+        for f, tmp_path, target in self.opened:
+            f.close()
+            # mkstemp creates 0600; give the script the permissions open() would have
+            os.chmod(tmp_path, 0o666 & ~umask)
+            os.replace(tmp_path, target)
+
+    def abort(self):
+        """Discard the partly written files"""
+        for f, tmp_path, _ in self.opened:
+            f.close()
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def counted(tests, totals):
+    """Pass tests through while counting tests and questions"""
+    for test in tests:
+        totals["tests"] += 1
+        totals["questions"] += len(test["questions"])
+        yield test
+
+
+def export_tests(tests, sinks, columns, fmt="insert", batch_size=DEFAULT_BATCH_SIZE, board=None, label="Tests", grade=None, subject="Mathematics", validate=True):
+    """
+    Write header, statements and footer for a stream of tests; returns the totals.
+    With `validate`, the first test that fails the schema raises ValueError with its path.
+    An input without any tests also raises ValueError, so no empty script is written.
+    """
+    totals = {"tests": 0, "questions": 0}
+    if validate:
+        tests = check_tests(tests)
+    sinks.write_line(f"-- SQL INSERT statements for {label}")
+    sinks.write_line(f"-- Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    sinks.write_line(f"-- Schema: {', '.join(columns)}")
+    if fmt == "copy":
+        sinks.write_line("-- Format: COPY FROM STDIN (run with psql -f)")
+    else:
+        sinks.write_line(f"-- Format: multi-row INSERT, {batch_size} tests per statement")
+    sinks.write_line("")
+
+    for line in export_lines(counted(tests, totals), columns, fmt, batch_size, board):
+        sinks.write_line(line)
+
+    if not totals["tests"]:
+        raise ValueError("no tests found in the input (not a test bank or tests backup?)")
+    sinks.write_line("")
+    sinks.write_line(f"-- Total tests: {totals['tests']}")
+    sinks.write_line(f"-- Total questions: {totals['questions']}")
+    if grade:
+        sinks.write_line("")
+        sinks.write_line("-- Verify the tests were inserted:")
+        sinks.write_line(f"SELECT COUNT(*) as total_tests FROM tests WHERE subject = '{subject}' AND grade = '{grade}';")
+        sinks.write_line("")
+        sinks.write_line(f"-- View all {grade} tests:")
+        sinks.write_line(f"SELECT id, title, timelimit, jsonb_array_length(questions) as question_count FROM tests WHERE subject = '{subject}' AND grade = '{grade}';")
+    return totals
+
+
+def print_import_instructions(output_file, fmt):
+    print(f"✅ SQL statements saved to: {output_file}")
+    print("\nTo import the tests:")
+    if fmt == "copy":
+        print(f"1. Run: psql \"$DATABASE_URL\" -f {output_file}")
+        print("2. Verify the tests were imported successfully")
+    else:
+        print(f"1. Copy the contents of {output_file}")
+        print("2. Go to your Supabase SQL Editor")
+        print("3. Paste and run the SQL statements")
+        print("4. Verify the tests were imported successfully")
+
+
+def run_preset(name, fmt="insert", batch_size=DEFAULT_BATCH_SIZE):
+    """Export with one of the PRESETS; returns True on success"""
+    preset = PRESETS[name]
+    outputs = list(preset["outputs"])
+    if fmt == "copy":
+        outputs = [o.replace(".sql", ".copy.sql") if o != "-" else o for o in outputs]
+    try:
+        with Sinks(outputs) as sinks:
+            export_tests(
+                iter_tests_stream(preset["input"]), sinks, SCHEMAS[preset["schema"]], fmt, batch_size,
+                preset["board"], preset["label"], preset["grade"]
+            )
+    except FileNotFoundError:
+        print(f"❌ Error: {preset['input']} not found!")
+        print(f"Please run 'python {preset['source_script']}' first to generate the test files.")
+        return False
+    except Exception as e:
+        print(f"❌ Error generating SQL, no output file was written: {e}")
+        return False
+
+    for output_file in outputs:
+        if output_file != "-":
+            print()
+            print_import_instructions(output_file, fmt)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream generated test banks into SQL for one or more outputs")
+    parser.add_argument("inputs", nargs="*", help="Test bank JSON files (list or {\"tests\": [...]})")
+    parser.add_argument("--preset", choices=sorted(PRESETS), help="Use the settings of one of the legacy exporters")
+    parser.add_argument("--output", action="append", help="Output file, '-' for stdout; repeat for several sinks")
+    parser.add_argument("--schema", choices=sorted(SCHEMAS), default="board", help="Target tests table with or without a board column")
+    parser.add_argument("--board", help="Board to write for every test (default: each test's own)")
+    parser.add_argument("--grade", help="Grade used in the verification queries")
+    parser.add_argument("--subject", default="Mathematics", help="Subject used in the verification queries")
+    parser.add_argument("--label", default="Generated Tests", help="Description in the header comment")
+    parser.add_argument("--no-validate", action="store_true", help="Skip schema validation of the input tests")
+    add_export_arguments(parser)
+    args = parser.parse_args()
+
+    if args.preset:
+        sys.exit(0 if run_preset(args.preset, args.format, args.batch_size) else 1)
+    if not args.inputs:
+        parser.error("give input files or --preset")
+
+    def all_tests():
+        for path in args.inputs:
+            found = 0
+            for test in iter_tests_stream(path):
+                found += 1
+                yield test
+            if not found:
+                print(f"⚠️  No tests found in {path}", file=sys.stderr)
+
+    try:
+        with Sinks(args.output or ["-"]) as sinks:
+            totals = export_tests(all_tests(), sinks, SCHEMAS[args.schema], args.format, args.batch_size,
+                                  args.board, args.label, args.grade, args.subject, not args.no_validate)
+    except ValueError as e:
+        print(f"❌ Export stopped and no output file was written: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ Exported {totals['tests']} tests ({totals['questions']} questions)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
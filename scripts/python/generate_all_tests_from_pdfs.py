@@ -1,7 +1,14 @@
+import argparse
 import json
+from functools import partial
 from pathlib import Path
 import PyPDF2
 
+from chapter_pool import add_jobs_argument, run_chapters
+from ingest_client import add_ingest_arguments, ingest_from_args
+from question_dedup import QuestionIndex
+from run_checkpoint import RunCheckpoint
+
 def extract_pdf_text(pdf_path):
     """Extract text from PDF file"""
     try:
@@ -279,80 +286,134 @@ def generate_questions_from_pdf_content(concept, concept_index, pdf_text, chapte
     
     return questions
 
-def generate_all_chapter_tests_from_pdfs():
+def flag_duplicate_questions(test, index, drop_duplicates=False):
+    """
+    Check a test's questions against the index (this run, plus other tests from
+    earlier runs with --dedup-index); return the number of near-duplicates
+    """
+    kept = []
+    duplicates = 0
+    for i, question in enumerate(test["questions"]):
+        match = index.check_and_add(question, f"{test['title']} #{i + 1}", owner=test["title"])
+        if match:
+            duplicates += 1
+            entry, score = match
+            print(f"   ⚠️  Near-duplicate ({score:.0%}) of {entry['source']}: {question['question']}")
+            if drop_duplicates:
+                continue
+        kept.append(question)
+    test["questions"] = kept
+    return duplicates
+
+CHAPTER_TITLES = {
+    1: "What's in a Name?",
+    2: "Fun with Numbers", 
+    3: "Give and Take",
+    4: "Long and Short",
+    5: "Shapes and Designs",
+    6: "Fun with Give and Take",
+    7: "Time Goes On",
+    8: "Who is Heavier?",
+    9: "How Many Times?",
+    10: "Play with Patterns",
+    11: "Jugs and Mugs",
+    12: "Can We Share?",
+    13: "Smart Charts",
+    14: "Rupees and Paise"
+}
+
+def process_chapter(chapter_num, checkpoint):
+    """Build one chapter's tests from its PDF (runs in a worker process with --jobs)"""
+    chapter_title = CHAPTER_TITLES[chapter_num]
+    
+    # Construct PDF file path
+    if chapter_num < 10:
+        pdf_file = Path(f"tmp/cemm10{chapter_num}.pdf")
+    else:
+        pdf_file = Path(f"tmp/cemm1{chapter_num}.pdf")
+    
+    if not pdf_file.exists():
+        return {"tests": None, "missing": True, "message": f"⚠️  PDF file not found: {pdf_file}"}
+    
+    # Extract text from PDF
+    pdf_text = extract_pdf_text(pdf_file)
+    if not pdf_text:
+        return {"tests": None, "message": f"❌ Could not extract text from {pdf_file}"}
+    
+    # Extract concepts from PDF content
+    concepts = extract_concepts_from_chapter_text(pdf_text, chapter_num)
+    
+    chapter_tests = []
+    restored = 0
+    for i, concept in enumerate(concepts):
+        test = checkpoint.load_concept(chapter_num, i)
+        if test is not None:
+            restored += 1
+            chapter_tests.append(test)
+            continue
+        
+        test = {
+            "title": f"Class 3 Math - Chapter {chapter_num}: {chapter_title} - {concept}",
+            "description": f"Test focusing on {concept} from Class 3 Math Chapter {chapter_num}: {chapter_title}.",
+            "subject": "Mathematics",
+            "grade": "3rd Grade",
+            "board": "CBSE",
+            "duration": 30,
+            "timelimit": 30,
+            "questions": generate_questions_from_pdf_content(concept, i, pdf_text, chapter_num)
+        }
+        checkpoint.save_concept(chapter_num, i, test)
+        chapter_tests.append(test)
+    
+    message = f"📄 {len(pdf_text)} characters, 🎯 concepts: {concepts}"
+    if restored:
+        message += f" ({restored} restored from checkpoint)"
+    return {"tests": chapter_tests, "message": message}
+
+def generate_all_chapter_tests_from_pdfs(dedup_index=None, drop_duplicates=False, checkpoint=None, jobs=1):
     """Generate tests for all chapters based on their PDF content"""
-    all_tests = []
+    index = dedup_index if dedup_index is not None else QuestionIndex()
+    duplicate_count = 0
+    checkpoint = checkpoint or RunCheckpoint("all_tests_from_pdfs")
+    print(f"💾 Checkpoints: {checkpoint.summary()}")
     
     # Create tests directory if it doesn't exist
     tests_dir = Path("tmp/tests")
     tests_dir.mkdir(parents=True, exist_ok=True)
     
-    chapter_titles = {
-        1: "What's in a Name?",
-        2: "Fun with Numbers", 
-        3: "Give and Take",
-        4: "Long and Short",
-        5: "Shapes and Designs",
-        6: "Fun with Give and Take",
-        7: "Time Goes On",
-        8: "Who is Heavier?",
-        9: "How Many Times?",
-        10: "Play with Patterns",
-        11: "Jugs and Mugs",
-        12: "Can We Share?",
-        13: "Smart Charts",
-        14: "Rupees and Paise"
-    }
-    
-    for chapter_num in range(1, 15):  # Chapters 1-14
-        print(f"\n📖 Processing Chapter {chapter_num}: {chapter_titles[chapter_num]}")
-        print("=" * 50)
-        
-        # Construct PDF file path
-        if chapter_num < 10:
-            pdf_file = Path(f"tmp/cemm10{chapter_num}.pdf")
-        else:
-            pdf_file = Path(f"tmp/cemm1{chapter_num}.pdf")
-        
-        if not pdf_file.exists():
-            print(f"⚠️  PDF file not found: {pdf_file}")
-            continue
-        
-        # Extract text from PDF
-        pdf_text = extract_pdf_text(pdf_file)
-        if not pdf_text:
-            print(f"❌ Could not extract text from {pdf_file}")
-            continue
-        
-        print(f"📄 Extracted {len(pdf_text)} characters from Chapter {chapter_num}")
-        
-        # Extract concepts from PDF content
-        concepts = extract_concepts_from_chapter_text(pdf_text, chapter_num)
-        print(f"🎯 Found concepts: {concepts}")
-        
-        chapter_tests = []
-        
-        for i, concept in enumerate(concepts):
-            test = {
-                "title": f"Class 3 Math - Chapter {chapter_num}: {chapter_titles[chapter_num]} - {concept}",
-                "description": f"Test focusing on {concept} from Class 3 Math Chapter {chapter_num}: {chapter_titles[chapter_num]}.",
-                "subject": "Mathematics",
-                "grade": "3rd Grade",
-                "board": "CBSE",
-                "duration": 30,
-                "timelimit": 30,
-                "questions": generate_questions_from_pdf_content(concept, i, pdf_text, chapter_num)
-            }
-            chapter_tests.append(test)
-            all_tests.append(test)
+    chapters = list(range(1, 15))  # Chapters 1-14
+    results = {}
+    for chapter_num in chapters:
+        if checkpoint.is_chapter_done(chapter_num):
+            results[chapter_num] = checkpoint.load_chapter(chapter_num)
+            print(f"⏭️  Chapter {chapter_num}: restored {len(results[chapter_num])} tests from checkpoint")
+    
+    pending = [chapter_num for chapter_num in chapters if chapter_num not in results]
+    worker = partial(process_chapter, checkpoint=checkpoint)
+    for done, (chapter_num, outcome) in enumerate(run_chapters(worker, pending, jobs), 1):
+        print(f"\n📖 [{done}/{len(pending)}] Chapter {chapter_num}: {CHAPTER_TITLES[chapter_num]}")
+        print(f"   {outcome['message']}")
+        if outcome["tests"]:
+            checkpoint.save_chapter(chapter_num, outcome["tests"])
+            results[chapter_num] = outcome["tests"]
+        elif outcome.get("missing"):
+            checkpoint.skip_chapter(chapter_num, outcome["message"])
+    
+    # Duplicate checks and output run in chapter order, so results match a serial run
+    all_tests = []
+    for chapter_num in sorted(results):
+        chapter_tests = results[chapter_num]
+        print(f"\n🔍 Checking Chapter {chapter_num} for near-duplicate questions")
+        for test in chapter_tests:
+            duplicate_count += flag_duplicate_questions(test, index, drop_duplicates)
+        all_tests.extend(chapter_tests)
         
         # Save individual chapter tests
         chapter_file = tests_dir / f"chapter_{chapter_num}_tests.json"
         with open(chapter_file, 'w', encoding='utf-8') as f:
             json.dump(chapter_tests, f, indent=2, ensure_ascii=False)
         
-        print(f"✅ Generated {len(chapter_tests)} tests for Chapter {chapter_num}")
-        print(f"📁 Saved to: {chapter_file}")
+        print(f"✅ {len(chapter_tests)} tests for Chapter {chapter_num} saved to: {chapter_file}")
     
     # Save all tests to a single file
     output_file = tests_dir / "all_chapter_tests_from_pdfs.json"
@@ -362,19 +423,45 @@ def generate_all_chapter_tests_from_pdfs():
     print(f"\n🎉 Generated {len(all_tests)} total tests from PDFs!")
     print(f"📁 All tests saved to: {output_file}")
     print(f"📊 Total questions: {sum(len(test['questions']) for test in all_tests)}")
+    print(f"🔍 Near-duplicate questions {'dropped' if drop_duplicates else 'flagged'}: {duplicate_count}")
+    if checkpoint.finish(chapters):
+        print("💾 Run complete, checkpoints cleared")
+    else:
+        print(f"💾 Some chapters failed; re-run to retry them, or pass --fresh to start over ({checkpoint.summary()})")
     
-    return all_tests
+    return all_tests, duplicate_count
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate chapter tests from PDF content")
+    parser.add_argument("--dedup-index", help="Persist the duplicate index here to catch repeats across runs")
+    parser.add_argument("--drop-duplicates", action="store_true", help="Remove near-duplicate questions instead of only flagging them")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Similarity at which questions count as duplicates")
+    parser.add_argument("--fresh", action="store_true", help="Ignore checkpoints from a previous run and start over")
+    add_jobs_argument(parser)
+    add_ingest_arguments(parser)
+    args = parser.parse_args()
+    
     print("📚 Generating ALL Chapter Tests from PDF Content")
     print("=" * 60)
     
-    all_tests = generate_all_chapter_tests_from_pdfs()
+    if args.dedup_index:
+        index = QuestionIndex.load(args.dedup_index, args.threshold)
+    else:
+        index = QuestionIndex(args.threshold)
+    checkpoint = RunCheckpoint("all_tests_from_pdfs", fresh=args.fresh)
+    all_tests, duplicate_count = generate_all_chapter_tests_from_pdfs(index, args.drop_duplicates, checkpoint, args.jobs)
+    if args.dedup_index:
+        index.save(args.dedup_index)
+    ingest_from_args(args, all_tests)
     
     print("\n✅ All tests generated from actual PDF content!")
-    print("✅ Each test has 10 unique questions!")
     print("✅ Tests are based on concepts found in the PDFs!")
-    print("✅ No duplicate questions!")
+    if duplicate_count == 0:
+        print("✅ No duplicate questions!")
+    elif args.drop_duplicates:
+        print(f"✅ Removed {duplicate_count} near-duplicate questions")
+    else:
+        print(f"⚠️  {duplicate_count} near-duplicate questions found (use --drop-duplicates to remove them)")
 
 if __name__ == "__main__":
     main()
@@ -3,12 +3,16 @@
 Generate Class 3 Math tests for chapters 2-14 based on PDF content
 """
 
+import argparse
 import json
 import os
 from pathlib import Path
 import PyPDF2
 import re
 
+from chapter_pool import add_jobs_argument, in_chapter_order, run_chapters
+from ingest_client import add_ingest_arguments, ingest_from_args
+
 def extract_text_from_pdf(pdf_path):
     """Extract text from a PDF file"""
     try:
@@ -669,45 +673,53 @@ def create_chapter_tests(chapter_num, content):
         "questions": []
     })
 
-def generate_all_tests():
-    """Generate tests for all chapters 2-14"""
-    tests = []
+def process_chapter(chapter_num):
+    """Extract one chapter PDF and build its test(s) (runs in a worker process with --jobs)"""
     tmp_dir = Path("tmp")
+    if chapter_num < 10:
+        pdf_file = tmp_dir / f"cemm10{chapter_num}.pdf"
+    else:
+        pdf_file = tmp_dir / f"cemm1{chapter_num}.pdf"
+    
+    if not pdf_file.exists():
+        return {"tests": None, "message": f"❌ File not found: {pdf_file}"}
+    
+    # Extract text from PDF
+    content = extract_text_from_pdf(pdf_file)
+    
+    # Create test(s) for this chapter; templates hold either one test or a "tests" list
+    template = create_chapter_tests(chapter_num, content)
+    chapter_tests = template["tests"] if "tests" in template else [template]
+    
+    for test_data in chapter_tests:
+        # Add common test properties
+        test_data.update({
+            "subject": "Mathematics",
+            "grade": "Class 3",
+            "board": "CBSE",
+            "duration": 25,
+            "timelimit": 25,
+            "questions": test_data["questions"]
+        })
     
-    for chapter_num in range(2, 15):  # Chapters 2-14
-        if chapter_num < 10:
-            pdf_file = tmp_dir / f"cemm10{chapter_num}.pdf"
-        else:
-            pdf_file = tmp_dir / f"cemm1{chapter_num}.pdf"
-        
-        if pdf_file.exists():
-            print(f"Processing Chapter {chapter_num}: {pdf_file.name}")
-            
-            # Extract text from PDF
-            content = extract_text_from_pdf(pdf_file)
-            
-            # Create test for this chapter
-            test_data = create_chapter_test(chapter_num, content)
-            
-            # Add common test properties
-            test_data.update({
-                "subject": "Mathematics",
-                "grade": "Class 3",
-                "board": "CBSE",
-                "duration": 25,
-                "timelimit": 25,
-                "questions": test_data["questions"]
-            })
-            
-            tests.append(test_data)
-            
-            # Save individual test file
-            output_file = f"class3_math_chapter_{chapter_num}_test.json"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(test_data, f, indent=2, ensure_ascii=False)
-            print(f"  ✅ Saved: {output_file}")
-        else:
-            print(f"  ❌ File not found: {pdf_file}")
+    # Save individual test file
+    output_file = f"class3_math_chapter_{chapter_num}_test.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(chapter_tests[0] if len(chapter_tests) == 1 else chapter_tests, f, indent=2, ensure_ascii=False)
+    return {"tests": chapter_tests, "message": f"✅ {pdf_file.name} -> {output_file}"}
+
+def generate_all_tests(jobs=1):
+    """Generate tests for all chapters 2-14"""
+    chapters = list(range(2, 15))  # Chapters 2-14
+    results = {}
+    
+    for done, (chapter_num, outcome) in enumerate(run_chapters(process_chapter, chapters, jobs), 1):
+        print(f"[{done}/{len(chapters)}] Chapter {chapter_num}: {outcome['message']}")
+        if outcome["tests"]:
+            results[chapter_num] = outcome["tests"]
+    
+    # Merge in chapter order so output matches a serial run
+    tests = in_chapter_order(results)
     
     # Save combined tests file
     combined_file = "all_class3_math_tests.json"
@@ -718,10 +730,15 @@ def generate_all_tests():
     return tests
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate Class 3 Math tests for chapters 2-14")
+    add_jobs_argument(parser)
+    add_ingest_arguments(parser)
+    args = parser.parse_args()
+    
     print("🚀 Generating Class 3 Math Tests for Chapters 2-14")
     print("=" * 50)
     
-    tests = generate_all_tests()
+    tests = generate_all_tests(args.jobs)
     
     print(f"\n📊 Summary:")
     print(f"   Total tests generated: {len(tests)}")
@@ -731,4 +748,6 @@ if __name__ == "__main__":
     for test in tests:
         print(f"   - {test['title']} ({len(test['questions'])} questions)")
     
+    ingest_from_args(args, tests)
+    
     print(f"\n🎉 All tests generated successfully!")
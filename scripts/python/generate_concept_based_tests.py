@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import argparse
 import json
 import os
 from pathlib import Path
@@ -7,6 +8,10 @@ import PyPDF2
 import re
 from typing import List, Dict, Any
 
+from chapter_pool import add_jobs_argument, in_chapter_order, run_chapters
+from ingest_client import add_ingest_arguments, ingest_from_args
+from run_checkpoint import RunCheckpoint
+
 def extract_text_from_pdf(pdf_path: str) -> str:
     """Extract text from PDF file"""
     try:
@@ -475,45 +480,66 @@ def create_concept_based_tests(chapter_num: int, chapter_text: str) -> List[Dict
     
     return tests
 
+def process_chapter(chapter_num: int) -> Dict[str, Any]:
+    """Extract one chapter PDF and build its concept tests (runs in a worker process with --jobs)"""
+    tmp_dir = Path("./tmp")
+    if chapter_num < 10:
+        pdf_file = tmp_dir / f"cemm10{chapter_num}.pdf"
+    else:
+        pdf_file = tmp_dir / f"cemm1{chapter_num}.pdf"
+    
+    if not pdf_file.exists():
+        return {"tests": None, "missing": True, "message": f"❌ PDF file not found: {pdf_file}"}
+    
+    # Extract text from PDF
+    chapter_text = extract_text_from_pdf(str(pdf_file))
+    chapter_text = clean_text(chapter_text)
+    if not chapter_text:
+        return {"tests": None, "message": f"❌ No text extracted from {pdf_file.name}"}
+    
+    # Create concept-based tests for this chapter
+    chapter_tests = create_concept_based_tests(chapter_num, chapter_text)
+    concepts = "".join(f"\n      - {test['title'].split(' - ')[-1]}" for test in chapter_tests)
+    return {
+        "tests": chapter_tests,
+        "message": f"✅ Extracted {len(chapter_text)} characters from {pdf_file.name}, "
+                   f"generated {len(chapter_tests)} concept-based tests{concepts}"
+    }
+
 def main():
     """Generate concept-based Class 3 Math tests from PDFs"""
+    parser = argparse.ArgumentParser(description="Generate concept-based Class 3 Math tests from PDFs")
+    parser.add_argument("--fresh", action="store_true", help="Ignore checkpoints from a previous run and start over")
+    add_jobs_argument(parser)
+    add_ingest_arguments(parser)
+    args = parser.parse_args()
+    
     print("📚 Generating Concept-Based Class 3 Math Tests from PDFs")
     print("=" * 60)
     
-    tmp_dir = Path("./tmp")
-    all_tests = []
+    checkpoint = RunCheckpoint("concept_based_class3", fresh=args.fresh)
+    print(f"💾 Checkpoints: {checkpoint.summary()}")
     
     # Process chapters 1-14
-    for chapter_num in range(1, 15):
-        if chapter_num < 10:
-            pdf_file = tmp_dir / f"cemm10{chapter_num}.pdf"
-        else:
-            pdf_file = tmp_dir / f"cemm1{chapter_num}.pdf"
-        
-        print(f"📖 Processing Chapter {chapter_num}: {pdf_file.name}")
-        
-        if pdf_file.exists():
-            # Extract text from PDF
-            chapter_text = extract_text_from_pdf(str(pdf_file))
-            chapter_text = clean_text(chapter_text)
-            
-            if chapter_text:
-                print(f"   ✅ Extracted {len(chapter_text)} characters")
-                
-                # Create concept-based tests for this chapter
-                chapter_tests = create_concept_based_tests(chapter_num, chapter_text)
-                all_tests.extend(chapter_tests)
-                
-                print(f"   📝 Generated {len(chapter_tests)} concept-based tests")
-                for test in chapter_tests:
-                    concept = test['title'].split(' - ')[-1]
-                    print(f"      - {concept}")
-            else:
-                print(f"   ❌ No text extracted from {pdf_file.name}")
-        else:
-            print(f"   ❌ PDF file not found: {pdf_file}")
-        
-        print()
+    chapters = list(range(1, 15))
+    results = {}
+    for chapter_num in chapters:
+        if checkpoint.is_chapter_done(chapter_num):
+            results[chapter_num] = checkpoint.load_chapter(chapter_num)
+            print(f"⏭️  Chapter {chapter_num}: restored {len(results[chapter_num])} tests from checkpoint")
+    
+    pending = [chapter_num for chapter_num in chapters if chapter_num not in results]
+    for done, (chapter_num, outcome) in enumerate(run_chapters(process_chapter, pending, args.jobs), 1):
+        print(f"📖 [{done}/{len(pending)}] Chapter {chapter_num}: {outcome['message']}")
+        if outcome["tests"]:
+            checkpoint.save_chapter(chapter_num, outcome["tests"])
+            results[chapter_num] = outcome["tests"]
+        elif outcome.get("missing"):
+            checkpoint.skip_chapter(chapter_num, outcome["message"])
+    print()
+    
+    # Merge in chapter order so output matches a serial run
+    all_tests = in_chapter_order(results)
     
     # Save all tests to a single JSON file in tmp/tests directory
     output_file = "tmp/tests/concept_based_class3_math_tests.json"
@@ -531,6 +557,11 @@ def main():
     print(f"🎉 Generated {len(all_tests)} concept-based tests!")
     print(f"📁 Saved to: {output_file}")
     print(f"📁 Individual chapter files saved to: tmp/tests/chapter_*_tests.json")
+    if checkpoint.finish(chapters):
+        print("💾 Run complete, checkpoints cleared")
+    else:
+        print(f"💾 Some chapters failed; re-run to retry them, or pass --fresh to start over ({checkpoint.summary()})")
+    ingest_from_args(args, all_tests)
     print(f"📊 Total questions: {len(all_tests) * 10}")
     print()
     print("✅ All tests have 10 unique questions each!")
@@ -0,0 +1,209 @@
+"""
+On-disk HTTP cache for the ebook scrapers.
+
+Each URL gets a small JSON record in the cache directory (ETag,
+Last-Modified, size, sha256, content type and where the body was saved). A
+fetch then goes one of three ways:
+
+- the body is already on disk with the recorded size (and hash, with
+  verify=True) and revalidation is off: no request at all
+- otherwise, if a usable body exists, a conditional GET (If-None-Match /
+  If-Modified-Since) that usually ends in a body-less 304
+- otherwise, a normal GET that saves the body and the record
+
+Bodies are streamed in chunks to a temporary `.part` file next to the
+destination, hashed on the way, and renamed into place only once complete,
+so memory stays flat for any file size and a partial download never sits at
+the final path. The record is written after the rename, so an interrupted
+crawl simply re-fetches whatever it had not finished and skips everything
+else.
+
+    cache = HttpCache("./tmp/http_cache", session)
+    page = cache.fetch(url, dest="tmp/pages/page_001.jpg")
+    page.status_code, page.path, page.from_cache
+"""
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = "./tmp/http_cache"
+CHUNK_SIZE = 1 << 16
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stream_to_file(response, dest, chunk_size=CHUNK_SIZE, hash_name="sha256", progress=None):
+    """
+    Write a streamed (stream=True) response to `dest` chunk by chunk through a
+    temporary file in the same directory, then rename it into place.
+    Returns (size, hexdigest or None); `progress(done, total)` is called per
+    chunk, with total None when the server sends no Content-Length.
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    # Leftovers from a download that was killed part-way
+    for stale in dest.parent.glob(f".{glob.escape(dest.name)}.*.part"):
+        stale.unlink(missing_ok=True)
+    total = response.headers.get("content-length")
+    # With a Content-Encoding the length is of the compressed bytes, not of what iter_content yields
+    encoded = response.headers.get("content-encoding", "identity") != "identity"
+    total = int(total) if total and total.isdigit() and not encoded else None
+    digest = hashlib.new(hash_name) if hash_name else None
+    done = 0
+    fd, tmp_path = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in response.iter_content(chunk_size):
+                if not chunk:
+                    continue
+                f.write(chunk)
+                if digest:
+                    digest.update(chunk)
+                done += len(chunk)
+                if progress:
+                    progress(done, total)
+        if total is not None and done != total:
+            raise IOError(f"incomplete download of {response.url}: {done} of {total} bytes")
+        os.replace(tmp_path, dest)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    finally:
+        response.close()
+    return done, digest.hexdigest() if digest else None
+
+
+class CachedResponse:
+    """Outcome of HttpCache.fetch; the body is read from disk on demand"""
+
+    def __init__(self, url, status_code, path=None, content_type="", from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.path = path
+        self.content_type = content_type
+        self.from_cache = from_cache
+
+    @property
+    def ok(self):
+        return self.status_code == 200 and self.path is not None
+
+    @property
+    def content(self):
+        return Path(self.path).read_bytes()
+
+    @property
+    def text(self):
+        return Path(self.path).read_text(encoding="utf-8", errors="replace")
+
+
+class HttpCache:
+    """Conditional-GET cache keyed by URL; safe to share between download threads"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, session=None, revalidate=True, verify=False, timeout=30):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        if session is None:
+            import requests
+            session = requests.Session()
+        self.session = session
+        self.revalidate = revalidate
+        self.verify = verify
+        self.timeout = timeout
+        self.stats = {"skipped": 0, "not_modified": 0, "downloaded": 0, "bytes": 0}
+        self._lock = threading.Lock()
+
+    def _key(self, url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+
+    def _record_path(self, url):
+        return self.cache_dir / f"{self._key(url)}.json"
+
+    def load_record(self, url):
+        try:
+            return json.loads(self._record_path(url).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _save_record(self, url, record):
+        path = self._record_path(url)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(record))
+        os.replace(tmp, path)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def body_is_current(self, record, dest):
+        """True when dest holds the body the record describes (size, and sha256 with verify)"""
+        if not record or not dest.exists() or dest.stat().st_size != record.get("size"):
+            return False
+        return not self.verify or file_sha256(dest) == record.get("sha256")
+
+    def fetch(self, url, dest=None, revalidate=None, headers=None, progress=None):
+        """
+        Fetch `url` into `dest` (default: inside the cache directory) and return
+        a CachedResponse; `revalidate` overrides the cache-wide setting and
+        `progress(done, total)` reports bytes as the body streams in
+        """
+        revalidate = self.revalidate if revalidate is None else revalidate
+        dest = Path(dest if dest is not None else self.cache_dir / f"{self._key(url)}.body").resolve()
+        record = self.load_record(url)
+        if record and record.get("path") != str(dest):
+            record = None  # saved somewhere else before; fetch again for this destination
+        current = self.body_is_current(record, dest)
+
+        if current and not revalidate:
+            self._count("skipped")
+            return CachedResponse(url, 200, dest, record.get("content_type", ""), from_cache=True)
+
+        request_headers = dict(headers or {})
+        if current:
+            if record.get("etag"):
+                request_headers["If-None-Match"] = record["etag"]
+            if record.get("last_modified"):
+                request_headers["If-Modified-Since"] = record["last_modified"]
+
+        response = self.session.get(url, headers=request_headers, timeout=self.timeout, stream=True)
+        if response.status_code == 304 and current:
+            response.close()
+            self._count("not_modified")
+            return CachedResponse(url, 200, dest, record.get("content_type", ""), from_cache=True)
+        if response.status_code != 200:
+            response.close()
+            return CachedResponse(url, response.status_code)
+
+        content_type = response.headers.get("content-type", "")
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        size, sha256 = stream_to_file(response, dest, progress=progress)
+        self._save_record(url, {
+            "url": url,
+            "path": str(dest),
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_type": content_type,
+            "size": size,
+            "sha256": sha256,
+        })
+        self._count("downloaded")
+        self._count("bytes", size)
+        return CachedResponse(url, 200, dest, content_type)
+
+    def summary(self):
+        s = self.stats
+        return (f"{s['downloaded']} downloaded ({s['bytes'] / 1024:.0f} KB), "
+                f"{s['not_modified']} not modified, {s['skipped']} already on disk")
@@ -0,0 +1,213 @@
+"""
+Streaming image-to-PDF writer.
+
+PIL's save_all keeps every decoded page in memory and re-encodes each one as
+a new JPEG. This writer emits the PDF one page at a time instead. JPEG files
+are embedded as-is (DCTDecode passthrough): only the header is parsed for
+size and colour space, and the bytes are copied straight from disk. Other
+formats (PNG, or JPEGs PDF viewers cannot take as-is) are decoded and saved
+as a JPEG one page at a time, like before. Memory stays constant whatever
+the page count, and the output is renamed into place only when complete.
+
+    images_to_pdf(["tmp/pages/page_001.jpg", ...], "tmp/book.pdf")
+
+    with PdfImageWriter("tmp/chapter.pdf") as pdf:
+        for path in pages:
+            pdf.add_image(path)
+"""
+
+import io
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+DEFAULT_DPI = 100  # same page size as the previous PIL resolution=100.0
+FALLBACK_QUALITY = 95
+
+# Start-of-frame markers PDF readers decode (DCTDecode): baseline, extended and progressive Huffman
+_PASSTHROUGH_SOF = {0xC0, 0xC1, 0xC2}
+# Other frame types (lossless, hierarchical, arithmetic coded) are re-encoded
+_OTHER_SOF = {0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_COLOR_SPACES = {1: "/DeviceGray", 3: "/DeviceRGB", 4: "/DeviceCMYK"}
+
+
+class PreparedImage:
+    """What the writer needs for one page: dimensions, colour space and the encoded bytes"""
+
+    def __init__(self, width, height, color_space, data=None, data_path=None, decode=None):
+        self.width = width
+        self.height = height
+        self.color_space = color_space
+        self.data = data
+        self.data_path = data_path
+        self.decode = decode
+
+    @property
+    def length(self):
+        return len(self.data) if self.data is not None else os.path.getsize(self.data_path)
+
+
+def jpeg_info(path):
+    """(width, height, components, adobe) from a JPEG's headers, or None if it cannot be embedded as-is"""
+    adobe = False
+    with open(path, "rb") as f:
+        if f.read(2) != b"\xff\xd8":
+            return None
+        while True:
+            byte = f.read(1)
+            if not byte:
+                return None
+            if byte != b"\xff":
+                continue
+            marker = f.read(1)
+            while marker == b"\xff":  # fill bytes
+                marker = f.read(1)
+            if not marker:
+                return None
+            code = marker[0]
+            if code in (0x01, 0xD8) or 0xD0 <= code <= 0xD7:
+                continue  # markers without a length
+            if code in (0xD9, 0xDA):
+                return None  # end of image or scan data before any frame header
+            length_bytes = f.read(2)
+            if len(length_bytes) < 2:
+                return None
+            length = int.from_bytes(length_bytes, "big")
+            segment = f.read(length - 2)
+            if code == 0xEE and segment.startswith(b"Adobe"):
+                adobe = True
+            if code in _OTHER_SOF:
+                return None
+            if code in _PASSTHROUGH_SOF:
+                if len(segment) < 6:
+                    return None
+                precision = segment[0]
+                height = int.from_bytes(segment[1:3], "big")
+                width = int.from_bytes(segment[3:5], "big")
+                components = segment[5]
+                if precision != 8 or not width or not height or components not in _COLOR_SPACES:
+                    return None
+                return width, height, components, adobe
+
+
+def prepare_image(path, quality=FALLBACK_QUALITY):
+    """Describe a page for the writer: JPEGs by reference, anything else re-encoded in memory"""
+    info = jpeg_info(path)
+    if info:
+        width, height, components, adobe = info
+        # Adobe CMYK JPEGs store inverted values
+        decode = "[1 0 1 0 1 0 1 0]" if components == 4 and adobe else None
+        return PreparedImage(width, height, _COLOR_SPACES[components], data_path=str(path), decode=decode)
+    return PreparedImage(*encode_jpeg(path, quality))
+
+
+def encode_jpeg(path, quality=FALLBACK_QUALITY):
+    """(width, height, color_space, jpeg_bytes) for a non-JPEG image, decoded with PIL"""
+    from PIL import Image
+
+    with Image.open(path) as img:
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        buffer = io.BytesIO()
+        img.save(buffer, "JPEG", quality=quality)
+        return img.width, img.height, _COLOR_SPACES[1 if img.mode == "L" else 3], buffer.getvalue()
+
+
+class PdfImageWriter:
+    """Writes a PDF with one image per page, streaming pages to disk as they are added"""
+
+    def __init__(self, output_pdf, dpi=DEFAULT_DPI):
+        self.output_pdf = Path(output_pdf)
+        self.output_pdf.parent.mkdir(parents=True, exist_ok=True)
+        self.scale = 72.0 / dpi
+        fd, self.tmp_path = tempfile.mkstemp(dir=self.output_pdf.parent, prefix=f".{self.output_pdf.name}.", suffix=".part")
+        self.f = os.fdopen(fd, "wb")
+        self.offsets = {}
+        self.page_ids = []
+        # Object 1 is the catalog and 2 the page tree, written last once every page is known
+        self.next_id = 3
+        self.f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _begin(self, object_id):
+        self.offsets[object_id] = self.f.tell()
+        self.f.write(f"{object_id} 0 obj\n".encode())
+
+    def _object(self, object_id, body):
+        self._begin(object_id)
+        self.f.write(body.encode() + b"\nendobj\n")
+
+    def _ids(self, count):
+        first = self.next_id
+        self.next_id += count
+        return range(first, first + count)
+
+    def add_prepared(self, image):
+        image_id, content_id, page_id = self._ids(3)
+        decode = f" /Decode {image.decode}" if image.decode else ""
+        self._begin(image_id)
+        self.f.write(
+            f"<< /Type /XObject /Subtype /Image /Width {image.width} /Height {image.height} "
+            f"/ColorSpace {image.color_space} /BitsPerComponent 8 /Filter /DCTDecode{decode} "
+            f"/Length {image.length} >>\nstream\n".encode()
+        )
+        if image.data is not None:
+            self.f.write(image.data)
+        else:
+            with open(image.data_path, "rb") as source:
+                shutil.copyfileobj(source, self.f, 1 << 20)
+        self.f.write(b"\nendstream\nendobj\n")
+
+        width, height = image.width * self.scale, image.height * self.scale
+        content = f"q {width:.2f} 0 0 {height:.2f} 0 0 cm /Im0 Do Q".encode()
+        self._begin(content_id)
+        self.f.write(f"<< /Length {len(content)} >>\nstream\n".encode() + content + b"\nendstream\nendobj\n")
+        self._object(page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width:.2f} {height:.2f}] "
+            f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>"
+        ))
+        self.page_ids.append(page_id)
+
+    def add_image(self, path):
+        self.add_prepared(prepare_image(path))
+
+    def close(self):
+        """Finish the page tree, catalog and xref, then move the file into place"""
+        if self.f.closed:
+            return
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>")
+        self._object(1, "<< /Type /Catalog /Pages 2 0 R >>")
+        xref_offset = self.f.tell()
+        self.f.write(f"xref\n0 {self.next_id}\n0000000000 65535 f \n".encode())
+        for object_id in range(1, self.next_id):
+            self.f.write(f"{self.offsets[object_id]:010d} 00000 n \n".encode())
+        self.f.write(f"trailer\n<< /Size {self.next_id} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+        self.f.close()
+        os.replace(self.tmp_path, self.output_pdf)
+
+    def abort(self):
+        """Discard a partly written PDF"""
+        if not self.f.closed:
+            self.f.close()
+        try:
+            os.unlink(self.tmp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def images_to_pdf(image_files, output_pdf, dpi=DEFAULT_DPI):
+    """Write one page per image to output_pdf; returns the page count"""
+    with PdfImageWriter(output_pdf, dpi) as pdf:
+        for image_file in image_files:
+            pdf.add_image(image_file)
+        return len(pdf.page_ids)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the Python entry points.
+
+Each entry point is imported in a fresh interpreter with `-X importtime`; the
+report gives the median cumulative import time against its budget, the
+slowest nested imports, and any heavy SDK pulled in at import time. Heavy
+SDKs (openai, google.generativeai, PyPDF2, requests) must be imported inside
+the functions that use them, so a processor only pays for the provider and
+code path a job actually takes.
+
+Usage:
+    python import_budget.py                    # all entry points, exit 1 on violations
+    python import_budget.py pdf_processor_gemini --runs 10 --top 15
+    python import_budget.py --json > tmp/import_times.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# Cumulative import budget in milliseconds for each entry point
+BUDGETS_MS = {
+    "pdf_processor": 60,
+    "pdf_processor_free": 60,
+    "pdf_processor_gemini": 60,
+    "bulk_generate": 80,
+    "benchmark_pipeline": 80,
+    "mock_llm_server": 100,
+}
+
+# Modules that must never be imported just by loading an entry point
+DEFERRED_MODULES = ("openai", "google.generativeai", "PyPDF2", "requests")
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into (name, depth, self_us, cumulative_us) tuples"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us, name = int(parts[0]), int(parts[1]), parts[2]
+        except (ValueError, IndexError):
+            continue
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((name.strip(), depth, self_us, cumulative_us))
+    return rows
+
+
+def measure_once(module):
+    """Import `module` in a fresh interpreter and return its parsed import rows"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SCRIPT_DIR, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"
+        raise RuntimeError(error)
+    return parse_importtime(proc.stderr)
+
+
+def measure(module, runs=5, top=10):
+    """Median import time of one entry point plus its slowest imports and deferred-module leaks"""
+    timings = []
+    rows = []
+    for _ in range(runs):
+        rows = measure_once(module)
+        total = next((cumulative for name, depth, _, cumulative in rows if name == module and depth == 0), None)
+        if total is None:
+            raise RuntimeError(f"{module} missing from -X importtime output")
+        timings.append(total / 1000.0)
+
+    # -X importtime prints a module after its children, so the entry point's
+    # imports are the rows between it and the previous top-level row
+    start = next(i for i, row in enumerate(rows) if row[0] == module and row[1] == 0)
+    nested = rows[:start]
+    for i in range(start - 1, -1, -1):
+        if rows[i][1] == 0:
+            nested = rows[i + 1:start]
+            break
+    imported = {name for name, _, _, _ in nested}
+    slowest = sorted(nested, key=lambda row: row[3], reverse=True)[:top]
+
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(timings), 2),
+        "min_ms": round(min(timings), 2),
+        "budget_ms": BUDGETS_MS.get(module),
+        "deferred_violations": [name for name in DEFERRED_MODULES if name in imported],
+        "slowest": [{"module": name, "cumulative_ms": round(cumulative / 1000.0, 2)} for name, _, _, cumulative in slowest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import-time budgets of the Python entry points")
+    parser.add_argument("modules", nargs="*", help="Entry points to check (default: all budgeted ones)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per entry point")
+    parser.add_argument("--top", type=int, default=8, help="Slowest nested imports to list")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    failures = 0
+    reports = []
+    for module in args.modules or list(BUDGETS_MS):
+        try:
+            report = measure(module, args.runs, args.top)
+        except RuntimeError as e:
+            report = {"module": module, "error": str(e)}
+        over_budget = report.get("budget_ms") is not None and report["median_ms"] > report["budget_ms"]
+        report["ok"] = "error" not in report and not over_budget and not report["deferred_violations"]
+        failures += not report["ok"]
+        reports.append(report)
+
+        if args.json:
+            continue
+        if "error" in report:
+            print(f"❌ {module}: import failed: {report['error']}")
+            continue
+        status = "✅" if report["ok"] else "❌"
+        budget = f"{report['budget_ms']}ms" if report["budget_ms"] is not None else "no budget"
+        print(f"{status} {module}: {report['median_ms']:.1f}ms median (min {report['min_ms']:.1f}ms, budget {budget})")
+        for name in report["deferred_violations"]:
+            print(f"   ⚠️  imports {name} at module load; move the import into the function that uses it")
+        for row in report["slowest"]:
+            print(f"   {row['cumulative_ms']:8.2f}ms  {row['module']}")
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Python client for adding generated tests to the database.
+
+Replaces the old `from lib.database import testService` calls, which point
+at the TypeScript service and cannot run from Python, and the one-call-per-
+test `addTest` loop. Tests are inserted in batches with execute_values over a
+single reused connection. Each batch is its own transaction. A batch that
+fails with a transient error (dropped connection, serialization failure,
+deadlock) before it commits is retried with backoff on a fresh connection.
+If the connection drops during COMMIT the batch may or may not have been
+saved, so it is not retried (that could insert it twice); the error says so.
+When a batch fails for good, earlier batches stay committed: add_tests raises
+PartialIngestError with their ids and count, and a re-run can skip them with
+--ingest-skip N.
+
+    with IngestClient(dsn) as client:
+        ids = client.add_tests(tests)
+
+Generator scripts get the same behaviour from the command line through
+add_ingest_arguments() / ingest_from_args():
+
+    python generate_concept_based_tests.py --ingest [--dsn URL] [--ingest-dry-run]
+"""
+
+import os
+import random
+import sys
+import time
+
+from schema_validator import validate_test as schema_errors
+from sql_statements import TEST_COLUMNS, insert_statements, test_values
+
+# SQLSTATEs worth retrying: serialization failure, deadlock, admin shutdown, too many connections
+TRANSIENT_SQLSTATES = {"40001", "40P01", "57P01", "53300"}
+# At COMMIT only these mean the server rolled the transaction back; anything else may have committed
+COMMIT_RETRY_SQLSTATES = {"40001", "40P01"}
+
+
+class PartialIngestError(Exception):
+    """A batch failed after earlier batches were committed; `ids` are theirs, `committed` their test count"""
+
+    def __init__(self, message, ids, committed):
+        super().__init__(message)
+        self.ids = ids
+        self.committed = committed
+
+
+def validate_test(test, index=0):
+    """Raise ValueError if a test does not match the test schema"""
+    errors = schema_errors(test, (None, "tests"), index)
+    if errors:
+        raise ValueError("; ".join(f"{path}: {message}" for path, message in errors[:5]))
+
+
+class IngestClient:
+    """Batched, retrying test inserts over one reused connection"""
+
+    def __init__(self, dsn=None, batch_size=200, max_retries=3, dry_run=False, default_board="CBSE",
+                 columns=TEST_COLUMNS, backoff=0.5):
+        self.dsn = dsn or os.getenv("DATABASE_URL")
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max_retries
+        self.dry_run = dry_run
+        self.default_board = default_board
+        self.columns = columns
+        self.backoff = backoff
+        self.conn = None
+        self.stats = {"tests": 0, "batches": 0, "retries": 0}
+        if not self.dry_run and not self.dsn:
+            raise Exception("No database connection string: pass dsn or set DATABASE_URL")
+
+    def _connect(self):
+        if self.conn is None or self.conn.closed:
+            try:
+                import psycopg2
+            except ImportError:
+                raise Exception("psycopg2 is required for ingestion: pip install psycopg2-binary")
+            self.conn = psycopg2.connect(self.dsn)
+        return self.conn
+
+    def _is_transient(self, error):
+        import psycopg2
+        if isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+            return True
+        return getattr(error, "pgcode", None) in TRANSIENT_SQLSTATES
+
+    def _rows(self, tests):
+        for index, test in enumerate(tests):
+            validate_test(test, index)
+            if not test.get("board"):
+                test = dict(test, board=self.default_board)
+            yield test_values(test, self.columns)
+
+    def _insert_batch(self, rows):
+        from psycopg2.extras import execute_values
+
+        import psycopg2
+
+        sql = f"INSERT INTO tests ({', '.join(self.columns)}) VALUES %s RETURNING id"
+        for attempt in range(self.max_retries + 1):
+            conn = self._connect()
+            try:
+                try:
+                    with conn.cursor() as cursor:
+                        returned = execute_values(cursor, sql, rows, page_size=len(rows), fetch=True)
+                except Exception:
+                    # Nothing was committed, so the batch can be retried as a whole
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        pass
+                    raise
+                try:
+                    conn.commit()
+                except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                    if getattr(e, "pgcode", None) not in COMMIT_RETRY_SQLSTATES:
+                        # The connection went away mid-COMMIT: the batch may already be saved
+                        self.close()
+                        raise Exception(f"connection lost while committing a batch of {len(rows)} tests; "
+                                        f"check the tests table before re-running ({e})") from e
+                    raise  # rejected by the server (e.g. serialization failure): rolled back, safe to retry
+                return [str(row[0]) for row in returned]
+            except Exception as e:
+                if attempt == self.max_retries or not self._is_transient(e):
+                    raise
+                self.stats["retries"] += 1
+                delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+                print(f"⏳ Transient database error ({e.__class__.__name__}); retrying batch in {delay:.1f}s", file=sys.stderr)
+                self.close()
+                time.sleep(delay)
+
+    def add_tests(self, tests, progress=None, skip=0):
+        """
+        Insert tests in batches; returns the new ids (empty in dry-run mode).
+        `skip` leaves out the first tests (committed by an earlier, failed run).
+        Raises PartialIngestError if a batch fails after others were committed.
+        """
+        tests = list(tests)[skip:]
+        rows = list(self._rows(tests))
+        if self.dry_run:
+            statements = list(insert_statements(tests, self.columns, self.batch_size, board=None))
+            print(f"🧪 Dry run: {len(rows)} tests would be inserted in {len(statements)} batched statements")
+            self.stats["tests"] += len(rows)
+            self.stats["batches"] += len(statements)
+            return []
+
+        ids = []
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            try:
+                ids.extend(self._insert_batch(batch))
+            except Exception as e:
+                if not ids:
+                    raise
+                raise PartialIngestError(f"{str(e).strip()} ({len(ids)} tests before this batch were committed)", ids, len(ids)) from e
+            self.stats["tests"] += len(batch)
+            self.stats["batches"] += 1
+            if progress:
+                progress(len(ids), len(rows))
+        return ids
+
+    def add_test(self, title, description, subject, grade, board, duration, questions):
+        """Single-test convenience with testService.addTest's arguments; returns the id"""
+        test = {"title": title, "description": description, "subject": subject, "grade": grade,
+                "board": board, "duration": duration, "questions": questions}
+        ids = self.add_tests([test])
+        return ids[0] if ids else None
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def add_ingest_arguments(parser):
+    """Add --ingest, --dsn, --ingest-dry-run, --ingest-batch-size and --ingest-skip to a generator's parser"""
+    parser.add_argument("--ingest", action="store_true", help="Insert the generated tests into the database")
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL"), help="Postgres connection string (default: $DATABASE_URL)")
+    parser.add_argument("--ingest-dry-run", action="store_true", help="Validate and plan the insert without touching the database")
+    parser.add_argument("--ingest-batch-size", type=int, default=200, help="Tests per INSERT batch")
+    parser.add_argument("--ingest-skip", type=int, default=0,
+                        help="Skip the first N tests (already committed by a run that failed part-way)")
+
+
+def ingest_from_args(args, tests):
+    """Ingest `tests` if the generator was run with --ingest / --ingest-dry-run; returns the new ids"""
+    if not (args.ingest or args.ingest_dry_run):
+        return []
+    start = time.perf_counter()
+    skip = getattr(args, "ingest_skip", 0)
+    try:
+        with IngestClient(args.dsn, args.ingest_batch_size, dry_run=args.ingest_dry_run) as client:
+            ids = client.add_tests(tests, skip=skip)
+    except PartialIngestError as e:
+        print(f"❌ Ingestion failed: {e}")
+        print(f"🗄️  Committed ids: {', '.join(e.ids)}")
+        print(f"   Re-run with --ingest-skip {skip + e.committed} to insert only the remaining tests")
+        return e.ids
+    except Exception as e:
+        print(f"❌ Ingestion failed: {e}")
+        return []
+    if not args.ingest_dry_run:
+        elapsed = time.perf_counter() - start
+        print(f"🗄️  Inserted {len(ids)} tests in {client.stats['batches']} batches ({elapsed:.2f}s, {client.stats['retries']} retries)")
+    return ids
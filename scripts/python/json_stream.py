@@ -0,0 +1,141 @@
+"""
+Incremental reader for large test bank JSON files.
+
+`iter_tests_stream(path)` yields tests one at a time, reading the file in
+chunks and decoding one element at a time with json.JSONDecoder.raw_decode.
+It accepts the same shapes as schema_validator.locate_tests: a top-level
+list, {"tests": [...]}, a table backup ({"table": "tests", "data": [...]})
+and a full backup ({"data": {"tests": [...]}}). Memory stays proportional
+to the largest single test, not the file. Any other top-level object is
+yielded whole, like question_dedup.iter_tests.
+"""
+
+import json
+
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class _Reader:
+    """Sliding text buffer over a file with raw_decode that reads more on demand"""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, minimum):
+        """Read until at least `minimum` more characters are buffered; False at EOF"""
+        if self.eof:
+            return False
+        # Drop consumed text so the buffer never holds more than the current element
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        target = len(self.buffer) + minimum
+        while len(self.buffer) < target:
+            chunk = self.f.read(max(self.chunk_size, minimum))
+            if not chunk:
+                self.eof = True
+                break
+            self.buffer += chunk
+        return True
+
+    def peek(self):
+        """Next non-whitespace character without consuming it ('' at EOF)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill(1) or self.pos >= len(self.buffer):
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value, reading more while it is incomplete"""
+        self.peek()
+        needed = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                # A number may continue past the buffer end (e.g. "12" of "123")
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(needed)
+            needed *= 2  # grow geometrically so huge elements are not re-parsed quadratically
+
+
+def _iter_array(reader):
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        separator = reader.peek()
+        reader.pos += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or ']' in array but found {separator or 'end of file'!r}")
+
+
+def _iter_object(reader, key, wrapper, whole):
+    """
+    Members of an object: stream `key`'s array, or descend into `wrapper`
+    (an array is streamed, an object searched for `key`). Without either, the
+    object is yielded whole if `whole`.
+    """
+    reader.expect("{")
+    other = {}
+    while reader.peek() != "}":
+        name = reader.value()
+        reader.expect(":")
+        if name in (key, wrapper) and reader.peek() == "[":
+            yield from _iter_array(reader)
+            return
+        if name == wrapper and reader.peek() == "{":
+            yield from _iter_object(reader, key, None, False)
+            return
+        other[name] = reader.value()
+        if reader.peek() == ",":
+            reader.pos += 1
+    if whole:
+        yield other
+
+
+def iter_json_array(f, key="tests", chunk_size=CHUNK_SIZE, wrapper="data"):
+    """
+    Yield elements of the top-level array, of `key` in a top-level object, or
+    of the array / `key` inside its `wrapper` member (backup files), from an
+    open text file. A top-level object with none of these is yielded whole.
+    """
+    reader = _Reader(f, chunk_size)
+    first = reader.peek()
+    if first == "[":
+        yield from _iter_array(reader)
+        return
+    if first != "{":
+        raise ValueError("Expected a JSON array or object")
+    yield from _iter_object(reader, key, wrapper, True)
+
+
+def iter_tests_stream(path, chunk_size=CHUNK_SIZE):
+    """Stream test dicts (those with a questions list) from a bank file"""
+    with open(path, "r", encoding="utf-8") as f:
+        for item in iter_json_array(f, "tests", chunk_size):
+            if isinstance(item, dict) and isinstance(item.get("questions"), list):
+                yield item
@@ -0,0 +1,240 @@
+"""
+Tolerant JSON parsing for LLM responses.
+
+Models regularly wrap JSON in code fences or prose, leave trailing commas,
+use smart quotes, put raw newlines inside strings or get cut off mid-array.
+`parse_llm_json` repairs those defects and, for a truncated array, salvages
+every complete element instead of failing the whole (costly) call. It returns
+the parsed data together with a list describing what was fixed.
+"""
+
+import json
+import re
+
+FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*(.*?)\s*(?:```|$)", re.DOTALL)
+SMART_QUOTES = "“”„«»"
+# What can follow the comma after a complete value: another value or key, or a closing bracket
+VALUE_STARTS = '"{[]}-0123456789' + SMART_QUOTES
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+# A run of letters in any script (Python literals are ASCII, but prose need not be)
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+
+
+def _try_load(text):
+    try:
+        return True, json.loads(text)
+    except (json.JSONDecodeError, ValueError):
+        return False, None
+
+
+def _strip_wrapping(text, fixes):
+    """Remove code fences and any prose before the first JSON bracket"""
+    match = FENCE_PATTERN.search(text)
+    if match:
+        text = match.group(1)
+        fixes.append("stripped code fence")
+
+    starts = [i for i in (text.find("["), text.find("{")) if i != -1]
+    if starts and min(starts) > 0:
+        text = text[min(starts):]
+        fixes.append("stripped leading text")
+    return text.strip()
+
+
+def _next_significant(text, i):
+    """First non-space character at or after i ("" at the end)"""
+    while i < len(text) and text[i].isspace():
+        i += 1
+    return text[i] if i < len(text) else ""
+
+
+def _closes_smart_string(text, i):
+    """Whether a quote just before i ends a curly-quoted string rather than being part of it"""
+    following = _next_significant(text, i)
+    if following == ",":
+        # `”, then` is prose; a real delimiter is followed by the next value or key
+        j = text.index(",", i) + 1
+        following = _next_significant(text, j)
+        return following == "" or following in VALUE_STARTS
+    return following in ("", ":", "}", "]")
+
+
+def _scan_repair(text, fixes):
+    """
+    String-aware pass: drop trailing commas, escape raw control characters,
+    fix Python literals and turn curly quotes used as string delimiters into
+    straight ones. Curly quotes inside a normal string are content and kept.
+    Anything after the first complete top-level value (e.g. "Hope this
+    helps!") is dropped.
+    """
+    out = []
+    in_string = False
+    # A string opened with a curly quote is closed by one that ends the value (see _closes_smart_string)
+    smart_string = False
+    escaped = False
+    found = set()
+    depth = 0
+    i = 0
+
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif smart_string and (ch == '"' or ch in SMART_QUOTES):
+                if _closes_smart_string(text, i + 1):
+                    out.append('"')
+                    in_string = smart_string = False
+                elif ch == '"':
+                    out.append('\\"')
+                else:
+                    out.append(ch)
+                i += 1
+                continue
+            elif ch == '"':
+                in_string = False
+            elif ch in CONTROL_ESCAPES:
+                out.append(CONTROL_ESCAPES[ch])
+                found.add("escaped control characters")
+                i += 1
+                continue
+            out.append(ch)
+            i += 1
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in "[{":
+            depth += 1
+        elif ch in "]}":
+            depth -= 1
+            if depth == 0:
+                out.append(ch)
+                if text[i + 1:].strip():
+                    found.add("dropped trailing text")
+                break
+        elif ch in SMART_QUOTES:
+            # Only where a string can start, like a straight quote would
+            j = i - 1
+            while j >= 0 and text[j].isspace():
+                j -= 1
+            if j < 0 or text[j] in "{[,:":
+                out.append('"')
+                in_string = smart_string = True
+                found.add("replaced smart quotes")
+                i += 1
+                continue
+        elif ch == ",":
+            if _next_significant(text, i + 1) in ("]", "}"):
+                found.add("removed trailing commas")
+                i += 1
+                continue
+        elif ch.isalpha():
+            match = WORD_PATTERN.match(text, i)
+            word = match.group(0) if match else ch
+            if word in PYTHON_LITERALS:
+                out.append(PYTHON_LITERALS[word])
+                found.add("converted Python literals")
+                i += len(word)
+                continue
+            out.append(word)
+            i += len(word)
+            continue
+        out.append(ch)
+        i += 1
+
+    fixes.extend(sorted(found))
+    return "".join(out)
+
+
+def _salvage_truncated(text, fixes):
+    """Cut a truncated document back to its last complete element and close it"""
+    stack = []
+    in_string = False
+    string_is_key = False
+    escaped = False
+    previous = ""
+    # (cut position, open brackets at that point) for the last safe cut
+    last_cut = None
+
+    def can_cut():
+        # In a top-level array only whole elements are kept; objects keep every complete member
+        return stack and (stack[0] == "{" or len(stack) == 1)
+
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                previous = ch
+                # A finished string value (not a key) is a complete element
+                if not string_is_key and can_cut():
+                    last_cut = (i + 1, list(stack))
+            continue
+
+        if ch.isspace():
+            continue
+        if ch == '"':
+            in_string = True
+            string_is_key = bool(stack) and stack[-1] == "{" and previous in ("{", ",")
+        elif ch in "[{":
+            stack.append(ch)
+        elif ch in "]}":
+            if stack:
+                stack.pop()
+            if not stack:
+                return None  # document is complete; truncation is not the problem
+            if can_cut():
+                last_cut = (i + 1, list(stack))
+        elif ch == "," and can_cut():
+            last_cut = (i, list(stack))
+        previous = ch
+
+    if not stack or last_cut is None:
+        return None
+
+    cut, open_brackets = last_cut
+    closers = "".join("]" if b == "[" else "}" for b in reversed(open_brackets))
+    fixes.append("closed truncated JSON")
+    return text[:cut].rstrip().rstrip(",") + closers
+
+
+def parse_llm_json(text):
+    """
+    Parse JSON returned by an LLM, repairing common defects.
+
+    Returns (data, fixes) where fixes lists the repairs applied (empty for
+    clean input). Raises ValueError if nothing usable can be recovered.
+    """
+    fixes = []
+    text = (text or "").strip()
+
+    ok, data = _try_load(text)
+    if ok:
+        return data, fixes
+
+    text = _strip_wrapping(text, fixes)
+    ok, data = _try_load(text)
+    if ok:
+        return data, fixes
+
+    text = _scan_repair(text, fixes)
+    ok, data = _try_load(text)
+    if ok:
+        return data, fixes
+
+    salvaged = _salvage_truncated(text, fixes)
+    if salvaged is not None:
+        ok, data = _try_load(salvaged)
+        if ok:
+            if isinstance(data, list):
+                fixes.append(f"salvaged {len(data)} complete items")
+            return data, fixes
+
+    raise ValueError(f"Could not repair JSON response (tried: {', '.join(fixes) or 'strict parse'})")
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Ollama and OpenAI HTTP APIs used by the PDF processors.
+
+Serves `/api/generate` (Ollama) and `/v1/chat/completions` (OpenAI) with
+configurable latency, error rate and canned or templated question JSON, so the
+generation pipeline can be load-tested without paying for API calls.
+
+Usage:
+    python mock_llm_server.py --port 11434 --latency-mean 0.8 --error-rate 0.05
+
+Point the processors at it with:
+    OLLAMA_URL=http://localhost:11434/api/generate
+    OPENAI_API_BASE=http://localhost:11434/v1 OPENAI_API_KEY=mock
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CONFIG = {
+    "latency_dist": "fixed",   # fixed | uniform | normal | lognormal
+    "latency_mean": 0.0,       # seconds
+    "latency_jitter": 0.0,     # spread (uniform half-width / normal stddev / lognormal sigma)
+    "error_rate": 0.0,         # probability of an HTTP error response
+    "error_status": 500,
+    "retry_after": 1,          # seconds, sent with 429 responses
+    "truncate_rate": 0.0,      # probability of cutting the JSON body short
+    "canned_response": None,   # verbatim text returned instead of templated questions
+    "seed": None,
+}
+
+
+def sample_latency(config, rng):
+    """Draw one response delay (seconds) from the configured distribution"""
+    mean = config["latency_mean"]
+    jitter = config["latency_jitter"]
+    dist = config["latency_dist"]
+
+    if dist == "uniform":
+        delay = rng.uniform(mean - jitter, mean + jitter)
+    elif dist == "normal":
+        delay = rng.gauss(mean, jitter)
+    elif dist == "lognormal":
+        # Heavy right tail, median at `mean` - closest to real LLM latency
+        delay = mean * rng.lognormvariate(0, jitter) if mean > 0 else 0.0
+    else:
+        delay = mean
+    return max(0.0, delay)
+
+
+def build_questions(prompt):
+    """Build templated questions from the concept and count named in the prompt"""
+    count_match = re.search(r"Create (\d+)", prompt)
+    concept_match = re.search(r"concept(?: to focus on)?:\s*(.+)", prompt, re.IGNORECASE)
+    num_questions = int(count_match.group(1)) if count_match else 10
+    concept = concept_match.group(1).strip() if concept_match else "General"
+
+    questions = []
+    for i in range(num_questions):
+        answer = i % 4
+        questions.append({
+            "question": f"Mock question {i + 1} about {concept}?",
+            "options": [f"{concept} option {chr(65 + j)}" for j in range(4)],
+            "correctAnswer": answer,
+            "explanation": f"Option {chr(65 + answer)} is correct for mock question {i + 1}."
+        })
+    return questions
+
+
+def build_analysis(prompt):
+    """Build a templated analysis object (title, concepts, description)"""
+    return {
+        "title": "Mock Chapter",
+        "concepts": ["Mock Concept 1", "Mock Concept 2", "Mock Concept 3"],
+        "description": "Mock analysis generated by mock_llm_server.py"
+    }
+
+
+def build_completion_text(prompt, config, rng):
+    """Return the model text for a prompt, honouring canned output and truncation"""
+    if config["canned_response"] is not None:
+        text = config["canned_response"]
+    elif "Analyze this PDF content" in prompt:
+        text = json.dumps(build_analysis(prompt), indent=2)
+    else:
+        text = "```json\n" + json.dumps(build_questions(prompt), indent=2) + "\n```"
+
+    if config["truncate_rate"] and rng.random() < config["truncate_rate"]:
+        text = text[:int(len(text) * rng.uniform(0.5, 0.95))]
+    return text
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """Request handler emulating the Ollama and OpenAI chat endpoints"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b"{}"
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return {}
+
+    def _simulate(self):
+        """Apply latency and error injection; return True if an error was sent"""
+        config = self.server.config
+        with self.server.rng_lock:
+            delay = sample_latency(config, self.server.rng)
+            fail = self.server.rng.random() < config["error_rate"]
+            self.server.stats["requests"] += 1
+            if fail:
+                self.server.stats["errors"] += 1
+        time.sleep(delay)
+
+        if fail:
+            status = config["error_status"]
+            headers = {"Retry-After": str(config["retry_after"])} if status == 429 else None
+            self._send_json(status, {"error": {"message": f"Injected mock error {status}"}}, headers)
+            return True
+        return False
+
+    def do_GET(self):
+        if self.path in ("/", "/health", "/api/tags"):
+            self._send_json(200, {"status": "ok", "stats": self.server.stats})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        payload = self._read_json()
+
+        if self.path == "/api/generate":
+            if self._simulate():
+                return
+            prompt = payload.get("prompt", "")
+            with self.server.rng_lock:
+                text = build_completion_text(prompt, self.server.config, self.server.rng)
+            self._send_json(200, {
+                "model": payload.get("model", "llama2"),
+                "response": text,
+                "done": True,
+                "prompt_eval_count": len(prompt) // 4,
+                "eval_count": len(text) // 4,
+            })
+        elif self.path.rstrip("/").endswith("/chat/completions"):
+            if self._simulate():
+                return
+            prompt = "\n".join(m.get("content", "") for m in payload.get("messages", []))
+            with self.server.rng_lock:
+                text = build_completion_text(prompt, self.server.config, self.server.rng)
+            self._send_json(200, {
+                "id": f"mock-{self.server.stats['requests']}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "gpt-4"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": len(prompt) // 4,
+                    "completion_tokens": len(text) // 4,
+                    "total_tokens": (len(prompt) + len(text)) // 4
+                }
+            })
+        else:
+            self._send_json(404, {"error": "not found"})
+
+
+def start_mock_server(config=None, host="127.0.0.1", port=0, verbose=False):
+    """Start the mock server on a background thread and return it (port=0 picks a free port)"""
+    merged = dict(DEFAULT_CONFIG)
+    merged.update(config or {})
+
+    server = ThreadingHTTPServer((host, port), MockLLMHandler)
+    server.daemon_threads = True
+    server.config = merged
+    server.verbose = verbose
+    server.rng = random.Random(merged["seed"])
+    server.rng_lock = threading.Lock()
+    server.stats = {"requests": 0, "errors": 0}
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def add_mock_arguments(parser):
+    """Register the latency / error / output options shared with the benchmark driver"""
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "normal", "lognormal"], default="fixed")
+    parser.add_argument("--latency-mean", type=float, default=0.0, help="Mean response delay in seconds")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="Spread of the latency distribution")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status for injected errors")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Fraction of responses cut short")
+    parser.add_argument("--canned", help="File whose contents are returned verbatim as model output")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible runs")
+
+
+def config_from_args(args):
+    """Build a mock server config from parsed command line arguments"""
+    canned = None
+    if args.canned:
+        with open(args.canned, "r", encoding="utf-8") as f:
+            canned = f.read()
+    return {
+        "latency_dist": args.latency_dist,
+        "latency_mean": args.latency_mean,
+        "latency_jitter": args.latency_jitter,
+        "error_rate": args.error_rate,
+        "error_status": args.error_status,
+        "retry_after": args.retry_after,
+        "truncate_rate": args.truncate_rate,
+        "canned_response": canned,
+        "seed": args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Ollama/OpenAI server for load-testing the PDF processors")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_mock_server(config_from_args(args), args.host, args.port, args.verbose)
+    host, port = server.server_address
+    print(f"🧪 Mock LLM server listening on http://{host}:{port}", file=sys.stderr)
+    print(f"   Ollama: http://{host}:{port}/api/generate", file=sys.stderr)
+    print(f"   OpenAI: http://{host}:{port}/v1/chat/completions", file=sys.stderr)
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(f"\n📊 Served {server.stats['requests']} requests ({server.stats['errors']} injected errors)", file=sys.stderr)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
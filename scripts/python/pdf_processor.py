@@ -1,13 +1,19 @@
 import sys
 import json
-import PyPDF2
 import re
-import openai
 from pathlib import Path
 import os
 
+from llm_json import parse_llm_json
+from processor_worker import FileCache, run_worker
+from result_stream import ResultStream, split_stream_flag, stdout_stream
+from schema_validator import valid_questions
+from telemetry import metrics, openai_usage, write_metrics_log
+
 def extract_text_from_pdf(file_path):
     """Extract text from PDF file"""
+    import PyPDF2
+    
     try:
         with open(file_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
@@ -19,6 +25,9 @@ def extract_text_from_pdf(file_path):
         print(f"Error extracting text from PDF: {e}", file=sys.stderr)
         return ""
 
+# Extracted text stays warm across jobs in --worker mode
+pdf_text_cache = FileCache()
+
 def extract_concepts_from_text(text, subject):
     """Extract concepts from text based on subject"""
     concepts = []
@@ -62,6 +71,7 @@ def extract_concepts_from_text(text, subject):
 
 def generate_ai_questions_for_concept(concept, subject, grade, pdf_text, num_questions=10):
     """Generate high-quality questions using AI based on PDF content"""
+    import openai
     
     # Set up OpenAI API
     openai.api_key = os.getenv('OPENAI_API_KEY')
@@ -106,38 +116,28 @@ Return ONLY a valid JSON array with this exact structure:
 Ensure all questions are factually accurate and directly related to the PDF content.
 """
 
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert educational content creator. Always respond with valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=4000,
-            temperature=0.7
-        )
+        with metrics.call("openai", "gpt-4", concept=concept) as call:
+            response = openai.ChatCompletion.create(
+                model="gpt-4",
+                messages=[
+                    {"role": "system", "content": "You are an expert educational content creator. Always respond with valid JSON only."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=4000,
+                temperature=0.7
+            )
+            call["prompt_tokens"], call["completion_tokens"] = openai_usage(response)
         
         # Parse AI response
         ai_response = response.choices[0].message.content.strip()
         
-        # Clean up the response to ensure it's valid JSON
-        if ai_response.startswith('```json'):
-            ai_response = ai_response[7:]
-        if ai_response.endswith('```'):
-            ai_response = ai_response[:-3]
+        # Parse the response, repairing common LLM JSON defects instead of failing the call
+        questions, json_fixes = parse_llm_json(ai_response)
+        if json_fixes:
+            print(f"🔧 Repaired AI response: {', '.join(json_fixes)}", file=sys.stderr)
         
-        questions = json.loads(ai_response)
-        
-        # Validate questions
-        validated_questions = []
-        for q in questions:
-            if (isinstance(q, dict) and 
-                'question' in q and 
-                'options' in q and 
-                'correctAnswer' in q and 
-                'explanation' in q and
-                len(q['options']) == 4 and
-                0 <= q['correctAnswer'] <= 3):
-                validated_questions.append(q)
+        # Keep the questions that match the shared question schema
+        validated_questions = valid_questions(questions)
         
         if len(validated_questions) >= num_questions:
             return validated_questions[:num_questions]
@@ -181,25 +181,25 @@ def extract_description_from_pdf(pdf_text, title, concepts):
     concept_list = ", ".join(concepts)
     return f"Test covering {concept_list} concepts from {title}. Questions are based on the actual content from the PDF."
 
-def main():
-    if len(sys.argv) != 5:
-        print("Usage: python pdf_processor.py <pdf_path> <subject> <grade> <board>", file=sys.stderr)
-        sys.exit(1)
-    
-    pdf_path = sys.argv[1]
-    subject = sys.argv[2]
-    grade = sys.argv[3]
-    board = sys.argv[4]
-    
+def process_pdf(pdf_path, subject, grade, board, stream=None):
+    """
+    Generate tests for one PDF and return the result object (one-shot CLI and
+    --worker). With an enabled ResultStream, progress and each test are written
+    as NDJSON while running and tests are not kept in the result.
+    """
+    stream = stream or ResultStream()
+    metrics.reset()
     try:
         # Extract text from PDF
-        pdf_text = extract_text_from_pdf(pdf_path)
+        with metrics.span("extract_text") as span, stream.stage("extract_text"):
+            pdf_text, span["cache_hit"] = pdf_text_cache.fetch(pdf_path, extract_text_from_pdf)
         
         if not pdf_text or pdf_text.strip() == "":
             raise Exception("No text could be extracted from the PDF")
         
         # Extract concepts
-        concepts = extract_concepts_from_text(pdf_text, subject)
+        with metrics.span("extract_concepts"), stream.stage("extract_concepts"):
+            concepts = extract_concepts_from_text(pdf_text, subject)
         
         # Generate title and description from PDF content
         base_title = extract_title_from_pdf(pdf_text, subject, grade)
@@ -211,7 +211,8 @@ def main():
             print(f"🤖 Generating AI questions for concept: {concept}", file=sys.stderr)
             
             # Generate high-quality questions using AI
-            questions = generate_ai_questions_for_concept(concept, subject, grade, pdf_text, 10)
+            with metrics.span("generate_questions", concept=concept), stream.stage("generate_questions", concept=concept):
+                questions = generate_ai_questions_for_concept(concept, subject, grade, pdf_text, 10)
             
             test = {
                 "title": f"{base_title} - {concept}",
@@ -223,7 +224,10 @@ def main():
                 "timelimit": 30,
                 "questions": questions
             }
-            tests.append(test)
+            if stream.enabled:
+                stream.test(concept, test)
+            else:
+                tests.append(test)
             print(f"✅ Generated {len(questions)} AI questions for {concept}", file=sys.stderr)
         
         # Output results as JSON
@@ -231,17 +235,40 @@ def main():
             "success": True,
             "tests": tests,
             "extractedText": pdf_text[:500] + "..." if len(pdf_text) > 500 else pdf_text,
-            "concepts": concepts
+            "concepts": concepts,
+            "metrics": metrics.to_dict()
         }
-        
-        print(json.dumps(result))
+        write_metrics_log(result["metrics"])
+        stream.finish(result)
+        return result
         
     except Exception as e:
         error_result = {
             "success": False,
-            "error": str(e)
+            "error": str(e),
+            "metrics": metrics.to_dict()
         }
-        print(json.dumps(error_result))
+        write_metrics_log(error_result["metrics"])
+        stream.finish(error_result)
+        return error_result
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        run_worker(process_pdf, sys.argv[1:])
+        return
+    
+    args, streaming = split_stream_flag(sys.argv[1:])
+    if len(args) != 4:
+        print("Usage: python pdf_processor.py [--stream] <pdf_path> <subject> <grade> <board>", file=sys.stderr)
+        print("       python pdf_processor.py --worker [--socket PATH]", file=sys.stderr)
+        sys.exit(1)
+    
+    if streaming:
+        result = process_pdf(*args, stream=stdout_stream())
+    else:
+        result = process_pdf(*args)
+        print(json.dumps(result))
+    if not result["success"]:
         sys.exit(1)
 
 if __name__ == "__main__":
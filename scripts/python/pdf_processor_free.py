@@ -1,13 +1,19 @@
 import sys
 import json
-import PyPDF2
 import re
-import requests
 import os
 from pathlib import Path
 
+from llm_json import parse_llm_json
+from processor_worker import FileCache, run_worker
+from result_stream import ResultStream, split_stream_flag, stdout_stream
+from schema_validator import valid_questions
+from telemetry import metrics, ollama_usage, openai_usage, write_metrics_log
+
 def extract_text_from_pdf(file_path):
     """Extract text from PDF file"""
+    import PyPDF2
+    
     try:
         with open(file_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
@@ -19,6 +25,20 @@ def extract_text_from_pdf(file_path):
         print(f"Error extracting text from PDF: {e}", file=sys.stderr)
         return ""
 
+# Extracted text stays warm across jobs in --worker mode
+pdf_text_cache = FileCache()
+
+# Keep-alive connection to Ollama reused by every request (created on first use)
+_http_session = None
+
+def get_http_session():
+    """Shared requests.Session; requests is only imported when Ollama is called"""
+    global _http_session
+    if _http_session is None:
+        import requests
+        _http_session = requests.Session()
+    return _http_session
+
 def extract_concepts_from_text(text, subject):
     """Extract concepts from text based on subject"""
     concepts = []
@@ -62,10 +82,11 @@ def extract_concepts_from_text(text, subject):
 
 def generate_ollama_questions_for_concept(concept, subject, grade, pdf_text, num_questions=10):
     """Generate questions using Ollama (free local AI)"""
+    import requests
     
     try:
-        # Ollama API endpoint (assuming it's running locally)
-        ollama_url = "http://localhost:11434/api/generate"
+        # Ollama API endpoint (assuming it's running locally; override for mock/remote servers)
+        ollama_url = os.getenv('OLLAMA_URL', "http://localhost:11434/api/generate")
         
         prompt = f"""
 You are an expert educational content creator specializing in {subject} for {grade} students.
@@ -102,31 +123,24 @@ Ensure all questions are factually accurate and directly related to the PDF cont
             "stream": False
         }
         
-        response = requests.post(ollama_url, json=payload, timeout=120)
+        with metrics.call("ollama", payload["model"], concept=concept) as call:
+            response = get_http_session().post(ollama_url, json=payload, timeout=120)
+            if response.status_code == 200:
+                result = response.json()
+                call["prompt_tokens"], call["completion_tokens"] = ollama_usage(result)
+            else:
+                call["ok"] = False
         
         if response.status_code == 200:
-            result = response.json()
             ai_response = result.get('response', '')
             
-            # Clean up the response
-            if ai_response.startswith('```json'):
-                ai_response = ai_response[7:]
-            if ai_response.endswith('```'):
-                ai_response = ai_response[:-3]
+            # Parse the response, repairing common LLM JSON defects instead of failing the call
+            questions, json_fixes = parse_llm_json(ai_response)
+            if json_fixes:
+                print(f"🔧 Repaired AI response: {', '.join(json_fixes)}", file=sys.stderr)
             
-            questions = json.loads(ai_response)
-            
-            # Validate questions
-            validated_questions = []
-            for q in questions:
-                if (isinstance(q, dict) and 
-                    'question' in q and 
-                    'options' in q and 
-                    'correctAnswer' in q and 
-                    'explanation' in q and
-                    len(q['options']) == 4 and
-                    0 <= q['correctAnswer'] <= 3):
-                    validated_questions.append(q)
+            # Keep the questions that match the shared question schema
+            validated_questions = valid_questions(questions)
             
             if len(validated_questions) >= num_questions:
                 return validated_questions[:num_questions]
@@ -140,8 +154,8 @@ Ensure all questions are factually accurate and directly related to the PDF cont
     except Exception as e:
         raise Exception(f"Ollama generation failed: {e}")
 
-def generate_openai_questions_for_concept(concept, subject, grade, pdf_text, num_questions=10):
-    """Generate questions using OpenAI (paid)"""
+def generate_openai_questions_for_concept(concept, subject, grade, pdf_text, num_questions=10, fallback=False):
+    """Generate questions using OpenAI (paid); fallback=True counts the call as a retry of Ollama"""
     import openai
     
     openai.api_key = os.getenv('OPENAI_API_KEY')
@@ -185,35 +199,27 @@ Return ONLY a valid JSON array with this exact structure:
 Ensure all questions are factually accurate and directly related to the PDF content.
 """
 
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert educational content creator. Always respond with valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=4000,
-            temperature=0.7
-        )
+        with metrics.call("openai", "gpt-4", concept=concept, retries=int(fallback)) as call:
+            response = openai.ChatCompletion.create(
+                model="gpt-4",
+                messages=[
+                    {"role": "system", "content": "You are an expert educational content creator. Always respond with valid JSON only."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=4000,
+                temperature=0.7
+            )
+            call["prompt_tokens"], call["completion_tokens"] = openai_usage(response)
         
         ai_response = response.choices[0].message.content.strip()
         
-        if ai_response.startswith('```json'):
-            ai_response = ai_response[7:]
-        if ai_response.endswith('```'):
-            ai_response = ai_response[:-3]
-        
-        questions = json.loads(ai_response)
+        # Parse the response, repairing common LLM JSON defects instead of failing the call
+        questions, json_fixes = parse_llm_json(ai_response)
+        if json_fixes:
+            print(f"🔧 Repaired AI response: {', '.join(json_fixes)}", file=sys.stderr)
         
-        validated_questions = []
-        for q in questions:
-            if (isinstance(q, dict) and 
-                'question' in q and 
-                'options' in q and 
-                'correctAnswer' in q and 
-                'explanation' in q and
-                len(q['options']) == 4 and
-                0 <= q['correctAnswer'] <= 3):
-                validated_questions.append(q)
+        # Keep the questions that match the shared question schema
+        validated_questions = valid_questions(questions)
         
         if len(validated_questions) >= num_questions:
             return validated_questions[:num_questions]
@@ -236,7 +242,7 @@ def generate_ai_questions_for_concept(concept, subject, grade, pdf_text, num_que
         # Fallback to OpenAI if available
         try:
             print(f"💰 Falling back to OpenAI for concept: {concept}", file=sys.stderr)
-            return generate_openai_questions_for_concept(concept, subject, grade, pdf_text, num_questions)
+            return generate_openai_questions_for_concept(concept, subject, grade, pdf_text, num_questions, fallback=True)
         except Exception as openai_error:
             raise Exception(f"Both Ollama and OpenAI failed. Ollama error: {ollama_error}. OpenAI error: {openai_error}")
 
@@ -268,25 +274,25 @@ def extract_description_from_pdf(pdf_text, title, concepts):
     concept_list = ", ".join(concepts)
     return f"AI-generated test covering {concept_list} concepts from {title}. Questions are based on the actual content from the PDF."
 
-def main():
-    if len(sys.argv) != 5:
-        print("Usage: python pdf_processor.py <pdf_path> <subject> <grade> <board>", file=sys.stderr)
-        sys.exit(1)
-    
-    pdf_path = sys.argv[1]
-    subject = sys.argv[2]
-    grade = sys.argv[3]
-    board = sys.argv[4]
-    
+def process_pdf(pdf_path, subject, grade, board, stream=None):
+    """
+    Generate tests for one PDF and return the result object (one-shot CLI and
+    --worker). With an enabled ResultStream, progress and each test are written
+    as NDJSON while running and tests are not kept in the result.
+    """
+    stream = stream or ResultStream()
+    metrics.reset()
     try:
         # Extract text from PDF
-        pdf_text = extract_text_from_pdf(pdf_path)
+        with metrics.span("extract_text") as span, stream.stage("extract_text"):
+            pdf_text, span["cache_hit"] = pdf_text_cache.fetch(pdf_path, extract_text_from_pdf)
         
         if not pdf_text or pdf_text.strip() == "":
             raise Exception("No text could be extracted from the PDF")
         
         # Extract concepts
-        concepts = extract_concepts_from_text(pdf_text, subject)
+        with metrics.span("extract_concepts"), stream.stage("extract_concepts"):
+            concepts = extract_concepts_from_text(pdf_text, subject)
         
         # Generate title and description from PDF content
         base_title = extract_title_from_pdf(pdf_text, subject, grade)
@@ -297,7 +303,8 @@ def main():
         for concept in concepts:
             print(f"🤖 Generating AI questions for concept: {concept}", file=sys.stderr)
             
-            questions = generate_ai_questions_for_concept(concept, subject, grade, pdf_text, 10)
+            with metrics.span("generate_questions", concept=concept), stream.stage("generate_questions", concept=concept):
+                questions = generate_ai_questions_for_concept(concept, subject, grade, pdf_text, 10)
             
             test = {
                 "title": f"{base_title} - {concept}",
@@ -309,7 +316,10 @@ def main():
                 "timelimit": 30,
                 "questions": questions
             }
-            tests.append(test)
+            if stream.enabled:
+                stream.test(concept, test)
+            else:
+                tests.append(test)
             print(f"✅ Generated {len(questions)} AI questions for {concept}", file=sys.stderr)
         
         # Output results as JSON
@@ -317,17 +327,40 @@ def main():
             "success": True,
             "tests": tests,
             "extractedText": pdf_text[:500] + "..." if len(pdf_text) > 500 else pdf_text,
-            "concepts": concepts
+            "concepts": concepts,
+            "metrics": metrics.to_dict()
         }
-        
-        print(json.dumps(result))
+        write_metrics_log(result["metrics"])
+        stream.finish(result)
+        return result
         
     except Exception as e:
         error_result = {
             "success": False,
-            "error": str(e)
+            "error": str(e),
+            "metrics": metrics.to_dict()
         }
-        print(json.dumps(error_result))
+        write_metrics_log(error_result["metrics"])
+        stream.finish(error_result)
+        return error_result
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        run_worker(process_pdf, sys.argv[1:])
+        return
+    
+    args, streaming = split_stream_flag(sys.argv[1:])
+    if len(args) != 4:
+        print("Usage: python pdf_processor_free.py [--stream] <pdf_path> <subject> <grade> <board>", file=sys.stderr)
+        print("       python pdf_processor_free.py --worker [--socket PATH]", file=sys.stderr)
+        sys.exit(1)
+    
+    if streaming:
+        result = process_pdf(*args, stream=stdout_stream())
+    else:
+        result = process_pdf(*args)
+        print(json.dumps(result))
+    if not result["success"]:
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -1,13 +1,19 @@
 import sys
 import json
-import google.generativeai as genai
+import re
 import os
 from pathlib import Path
-import base64
-import PyPDF2
+from concurrent.futures import ThreadPoolExecutor
+
+from llm_json import parse_llm_json
+from processor_worker import FileCache, run_worker
+from result_stream import ResultStream, split_stream_flag, stdout_stream
+from telemetry import gemini_usage, metrics, write_metrics_log
 
 def extract_text_from_pdf_fast(file_path):
     """Fast PDF text extraction using PyPDF2"""
+    import PyPDF2
+    
     try:
         with open(file_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
@@ -29,7 +35,72 @@ def load_pdf_for_gemini(file_path):
         print(f"Error loading PDF: {e}", file=sys.stderr)
         return None
 
-def generate_gemini_questions_for_concept(concept, subject, grade, pdf_path, num_questions=10, use_text_fallback=False):
+# Warm state reused across jobs in --worker mode. Gemini deletes uploaded
+# files after 48 hours, so cached uploads expire well before that.
+fast_text_cache = FileCache()
+uploaded_pdfs = FileCache(ttl=12 * 3600)
+_gemini_models = {}
+
+def get_gemini_model(api_key, model_name='gemini-2.5-flash'):
+    """Configure the SDK once per API key and reuse the model client"""
+    import google.generativeai as genai
+    
+    key = (api_key, model_name)
+    if key not in _gemini_models:
+        genai.configure(api_key=api_key)
+        _gemini_models[key] = genai.GenerativeModel(model_name)
+    return _gemini_models[key]
+
+def upload_pdf_to_gemini(pdf_path):
+    """
+    Upload a PDF once and reuse the handle while the file is unchanged;
+    returns (file handle, whether the cached upload was reused)
+    """
+    import google.generativeai as genai
+    
+    return uploaded_pdfs.fetch(pdf_path, lambda path: genai.upload_file(path=path, mime_type='application/pdf'))
+
+class ConceptStreamParser:
+    """Incrementally pick concept names out of a streamed analysis JSON response"""
+
+    STRING_PATTERN = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+    def __init__(self):
+        self.buffer = ""
+        self.concepts = []
+        self.closed = False
+
+    def feed(self, text):
+        """Add a chunk of response text and return any concept names completed by it"""
+        self.buffer += text
+        if self.closed:
+            return []
+
+        start = re.search(r'"concepts"\s*:\s*\[', self.buffer)
+        if not start:
+            return []
+
+        position = start.end()
+        found = []
+        while True:
+            match = self.STRING_PATTERN.search(self.buffer, position)
+            closing = self.buffer.find(']', position)
+            if closing != -1 and (not match or closing < match.start()):
+                # A ']' inside a still-open string is not the end of the array
+                if '"' not in self.buffer[position:closing]:
+                    self.closed = True
+                break
+            if not match:
+                break
+            found.append(json.loads(match.group(0)))
+            position = match.end()
+
+        new_concepts = found[len(self.concepts):]
+        self.concepts.extend(new_concepts)
+        return new_concepts
+
+
+def generate_gemini_questions_for_concept(concept, subject, grade, pdf_path, num_questions=10, use_text_fallback=False, pdf_file=None):
     """Generate questions using Google Gemini with PDF input and quality validation"""
     
     # Set up Gemini API
@@ -40,19 +111,22 @@ def generate_gemini_questions_for_concept(concept, subject, grade, pdf_path, num
     try:
         print(f"🚀 Generating questions for concept: {concept}", file=sys.stderr)
         
-        genai.configure(api_key=gemini_api_key)
-        model = genai.GenerativeModel('gemini-2.5-flash')
+        model = get_gemini_model(gemini_api_key)
         
         # Try PDF upload first, fallback to text if needed
         if use_text_fallback:
-            pdf_text = extract_text_from_pdf_fast(pdf_path)
+            with metrics.span("extract_text", concept=concept) as span:
+                pdf_text, span["cache_hit"] = fast_text_cache.fetch(pdf_path, extract_text_from_pdf_fast)
             if not pdf_text:
                 raise Exception("Could not extract text from PDF")
             print(f"📝 Using fast text extraction (first 2000 chars)", file=sys.stderr)
-        else:
+        elif pdf_file is None:
             # Upload PDF to Gemini
-            pdf_file = genai.upload_file(path=pdf_path, mime_type='application/pdf')
+            with metrics.span("upload_pdf", concept=concept) as span:
+                pdf_file, span["cache_hit"] = upload_pdf_to_gemini(pdf_path)
             print(f"📄 Using PDF upload to Gemini", file=sys.stderr)
+        else:
+            print(f"📄 Reusing PDF already uploaded to Gemini", file=sys.stderr)
         
         prompt = f"""
 You are an expert educational content creator specializing in {subject} for {grade} students.
@@ -98,20 +172,19 @@ Return ONLY a valid JSON array:
 ]
 """
 
-        # Generate content based on input type
-        if use_text_fallback:
-            response = model.generate_content([prompt, pdf_text])
-        else:
-            response = model.generate_content([prompt, pdf_file])
+        # Generate content based on input type (the text fallback is a retry of the PDF call)
+        with metrics.call("gemini", "gemini-2.5-flash", concept=concept, retries=int(use_text_fallback)) as call:
+            if use_text_fallback:
+                response = model.generate_content([prompt, pdf_text])
+            else:
+                response = model.generate_content([prompt, pdf_file])
+            call["prompt_tokens"], call["completion_tokens"] = gemini_usage(response)
         ai_response = response.text.strip()
         
-        # Clean up the response
-        if ai_response.startswith('```json'):
-            ai_response = ai_response[7:]
-        if ai_response.endswith('```'):
-            ai_response = ai_response[:-3]
-        
-        questions = json.loads(ai_response)
+        # Parse the response, repairing common LLM JSON defects instead of failing the call
+        questions, json_fixes = parse_llm_json(ai_response)
+        if json_fixes:
+            print(f"🔧 Repaired AI response: {', '.join(json_fixes)}", file=sys.stderr)
         
         # Accept all questions without validation (fastest approach)
         print(f"✅ Generated {len(questions)} questions without validation", file=sys.stderr)
@@ -120,21 +193,29 @@ Return ONLY a valid JSON array:
     except Exception as e:
         raise Exception(f"Gemini generation failed: {e}")
 
+def generate_concept_questions_with_fallback(concept, subject, grade, pdf_path, pdf_file=None):
+    """Generate questions from the uploaded PDF, falling back to fast text extraction"""
+    print(f"🚀 Generating fast Gemini AI questions for concept: {concept}", file=sys.stderr)
+    try:
+        return generate_gemini_questions_for_concept(concept, subject, grade, pdf_path, 10, use_text_fallback=False, pdf_file=pdf_file)
+    except Exception as e:
+        print(f"⚠️ PDF upload failed, trying fast text extraction: {e}", file=sys.stderr)
+        return generate_gemini_questions_for_concept(concept, subject, grade, pdf_path, 10, use_text_fallback=True)
+
 # Removed hardcoded title extraction - now using AI analysis
 
-def main():
-    if len(sys.argv) != 5:
-        print("Usage: python pdf_processor_gemini.py <pdf_path> <subject> <grade> <board>", file=sys.stderr)
-        sys.exit(1)
-    
-    pdf_path = sys.argv[1]
-    subject = sys.argv[2]
-    grade = sys.argv[3]
-    board = sys.argv[4]
-    
+def process_pdf(pdf_path, subject, grade, board, stream=None):
+    """
+    Generate tests for one PDF and return the result object (one-shot CLI and
+    --worker). With an enabled ResultStream, progress and each test are written
+    as NDJSON while running and tests are not kept in the result.
+    """
+    stream = stream or ResultStream()
+    metrics.reset()
     try:
         # Load PDF data for Gemini
-        pdf_data = load_pdf_for_gemini(pdf_path)
+        with metrics.span("load_pdf"), stream.stage("load_pdf"):
+            pdf_data = load_pdf_for_gemini(pdf_path)
         
         if not pdf_data:
             raise Exception("Could not load PDF file")
@@ -148,9 +229,9 @@ def main():
         print(f"🔍 Analyzing PDF content to identify key concepts...", file=sys.stderr)
         
         # Generate title and concepts using AI analysis
-        genai.configure(api_key=gemini_api_key)
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        pdf_file = genai.upload_file(path=pdf_path, mime_type='application/pdf')
+        model = get_gemini_model(gemini_api_key)
+        with metrics.span("upload_pdf") as span, stream.stage("upload_pdf"):
+            pdf_file, span["cache_hit"] = upload_pdf_to_gemini(pdf_path)
         
         analysis_prompt = f"""
 Analyze this PDF content for {subject} at {grade} level and provide:
@@ -169,62 +250,139 @@ Return ONLY a JSON object with this exact structure:
 Focus on the actual content in the PDF, not generic concepts.
 """
 
-        analysis_response = model.generate_content([analysis_prompt, pdf_file])
-        analysis_text = analysis_response.text.strip()
-        
-        if analysis_text.startswith('```json'):
-            analysis_text = analysis_text[7:]
-        if analysis_text.endswith('```'):
-            analysis_text = analysis_text[:-3]
-            
-        analysis_data = json.loads(analysis_text)
-        concepts = analysis_data.get('concepts', ['Core Concepts', 'Advanced Topics', 'Practical Applications'])
-        base_title = analysis_data.get('title', f"{grade} {subject} - Chapter Content")
-        base_description = analysis_data.get('description', f"AI-generated test covering key concepts from {base_title}. Questions are based on actual PDF content and designed for {grade} level.")
-        
-        print(f"📚 Identified concepts: {', '.join(concepts)}", file=sys.stderr)
-        
-        # Generate tests using Gemini AI with PDF input (much faster!)
-        tests = []
-        for concept in concepts:
-            print(f"🚀 Generating fast Gemini AI questions for concept: {concept}", file=sys.stderr)
-            
-            # Try PDF upload first, fallback to text extraction if it fails
+        # Stream the analysis so generation for each concept starts as soon as its
+        # name arrives, overlapping analysis latency with generation latency
+        default_concepts = ['Core Concepts', 'Advanced Topics', 'Practical Applications']
+        concept_parser = ConceptStreamParser()
+        pending = []
+        analysis_text = ""
+
+        # Not a `with` block: its exit would wait for discarded concepts still running
+        executor = ThreadPoolExecutor(max_workers=len(default_concepts))
+        try:
+            def start_concept(concept):
+                print(f"📚 Concept identified: {concept}", file=sys.stderr)
+                stream.emit("concept", concept=concept)
+                future = executor.submit(generate_concept_questions_with_fallback, concept, subject, grade, pdf_path, pdf_file)
+                pending.append((concept, future))
+
+            with stream.stage("analysis"), metrics.call("gemini", "gemini-2.5-flash", stage="analysis") as call:
+                analysis_response = model.generate_content([analysis_prompt, pdf_file], stream=True)
+                for chunk in analysis_response:
+                    chunk_text = chunk.text
+                    analysis_text += chunk_text
+                    for concept in concept_parser.feed(chunk_text):
+                        start_concept(concept)
+                    # Usage metadata is cumulative; the last chunk carries the totals
+                    prompt_tokens, completion_tokens = gemini_usage(chunk)
+                    if prompt_tokens or completion_tokens:
+                        call["prompt_tokens"], call["completion_tokens"] = prompt_tokens, completion_tokens
+
             try:
-                questions = generate_gemini_questions_for_concept(concept, subject, grade, pdf_path, 10, use_text_fallback=False)
-            except Exception as e:
-                print(f"⚠️ PDF upload failed, trying fast text extraction: {e}", file=sys.stderr)
-                questions = generate_gemini_questions_for_concept(concept, subject, grade, pdf_path, 10, use_text_fallback=True)
-            
-            test = {
-                "title": f"{grade} {subject} - {concept}",
-                "description": f"Test covering {concept} concepts for {grade} level students.",
-                "subject": subject,
-                "grade": grade,
-                "board": board,
-                "duration": 30,
-                "timelimit": 30,
-                "questions": questions
-            }
-            tests.append(test)
-            print(f"✅ Generated {len(questions)} fast AI questions for {concept}", file=sys.stderr)
+                analysis_data, json_fixes = parse_llm_json(analysis_text)
+                if json_fixes:
+                    print(f"🔧 Repaired analysis response: {', '.join(json_fixes)}", file=sys.stderr)
+                if not isinstance(analysis_data, dict):
+                    raise ValueError(f"Analysis response is a JSON {type(analysis_data).__name__}, not an object")
+            except ValueError:
+                if not pending:
+                    raise
+                # Concepts already streamed; the rest of the analysis is optional
+                analysis_data = {}
+
+            # The parsed analysis is authoritative: streamed concepts it does not list are
+            # dropped, and the ones the stream parser missed are started now
+            streamed = [concept for concept, _ in pending]
+            if analysis_data.get('concepts'):
+                final_concepts = [str(concept) for concept in analysis_data["concepts"]]
+            elif streamed:
+                print(f"⚠️ Analysis response could not be parsed; using the {len(streamed)} concepts streamed before it broke off", file=sys.stderr)
+                final_concepts = streamed
+            else:
+                print(f"⚠️ Analysis returned no concepts; falling back to default concepts: {', '.join(default_concepts)}", file=sys.stderr)
+                final_concepts = default_concepts
+
+            started = dict(pending)
+            pending.clear()
+            for concept in final_concepts:
+                if concept in started:
+                    pending.append((concept, started.pop(concept)))
+                else:
+                    start_concept(concept)
+            for concept, future in started.items():
+                future.cancel()  # ones already running finish in the background and are ignored
+                print(f"🗑️ Discarded concept not in the final analysis: {concept}", file=sys.stderr)
+
+            concepts = [concept for concept, _ in pending]
+            base_title = analysis_data.get('title', f"{grade} {subject} - Chapter Content")
+            base_description = analysis_data.get('description', f"AI-generated test covering key concepts from {base_title}. Questions are based on actual PDF content and designed for {grade} level.")
+
+            print(f"📚 Identified concepts: {', '.join(concepts)}", file=sys.stderr)
+
+            # Collect results in concept order (generation already running in parallel);
+            # in stream mode each test goes out as soon as it and its predecessors finish
+            tests = []
+            with metrics.span("await_generation"), stream.stage("await_generation"):
+                for concept, future in pending:
+                    questions = future.result()
+                    test = {
+                        "title": f"{grade} {subject} - {concept}",
+                        "description": f"Test covering {concept} concepts for {grade} level students.",
+                        "subject": subject,
+                        "grade": grade,
+                        "board": board,
+                        "duration": 30,
+                        "timelimit": 30,
+                        "questions": questions
+                    }
+                    if stream.enabled:
+                        stream.test(concept, test)
+                    else:
+                        tests.append(test)
+                    print(f"✅ Generated {len(questions)} fast AI questions for {concept}", file=sys.stderr)
+        finally:
+            # Queued concepts (discarded, or left over after an error) never start
+            executor.shutdown(wait=False, cancel_futures=True)
         
         # Output results as JSON
         result = {
             "success": True,
             "tests": tests,
             "extractedText": "PDF processed directly by Gemini AI (faster method)",
-            "concepts": concepts
+            "concepts": concepts,
+            "metrics": metrics.to_dict()
         }
-        
-        print(json.dumps(result))
+        write_metrics_log(result["metrics"])
+        stream.finish(result)
+        return result
         
     except Exception as e:
         error_result = {
             "success": False,
-            "error": str(e)
+            "error": str(e),
+            "metrics": metrics.to_dict()
         }
-        print(json.dumps(error_result))
+        write_metrics_log(error_result["metrics"])
+        stream.finish(error_result)
+        return error_result
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        run_worker(process_pdf, sys.argv[1:])
+        return
+    
+    args, streaming = split_stream_flag(sys.argv[1:])
+    if len(args) != 4:
+        print("Usage: python pdf_processor_gemini.py [--stream] <pdf_path> <subject> <grade> <board>", file=sys.stderr)
+        print("       python pdf_processor_gemini.py --worker [--socket PATH]", file=sys.stderr)
+        sys.exit(1)
+    
+    if streaming:
+        result = process_pdf(*args, stream=stdout_stream())
+    else:
+        result = process_pdf(*args)
+        print(json.dumps(result))
+    if not result["success"]:
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -0,0 +1,179 @@
+"""
+Long-lived worker mode shared by the pdf_processor*.py scripts.
+
+Instead of one process per upload, a processor started with `--worker` stays
+up and answers one JSON line per job, keeping imported SDKs, configured
+clients and extracted-document state warm between jobs:
+
+    python pdf_processor_gemini.py --worker                      # jobs on stdin
+    python pdf_processor_gemini.py --worker --socket /tmp/gemini.sock
+
+Request line:  {"id": "42", "pdf_path": "...", "subject": "...", "grade": "...", "board": "..."}
+Response line: the same JSON the one-shot CLI prints, plus the request "id".
+With "stream": true the job answers with NDJSON event records instead (see
+result_stream.py), each tagged with the request "id" and ending in a summary.
+{"op": "ping"} answers {"ok": true}; {"op": "shutdown"} stops the worker.
+
+Jobs run one at a time because each job's telemetry lives in the shared
+`metrics` collector; start several workers for parallel uploads.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from result_stream import ResultStream
+
+REQUIRED_FIELDS = ("pdf_path", "subject", "grade", "board")
+
+
+class FileCache:
+    """
+    Small LRU cache of per-file results keyed by path, mtime and size, so a
+    re-uploaded or edited file is never served stale. Falsy results are not
+    cached; `ttl` expires entries that go stale remotely (e.g. Gemini uploads).
+    """
+
+    def __init__(self, max_entries=32, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(path):
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+    def get(self, path, loader):
+        """Return loader(path), reusing the cached value while the file is unchanged"""
+        return self.fetch(path, loader)[0]
+
+    def fetch(self, path, loader):
+        """Like get(), but returns (value, hit) so callers can record cache hits"""
+        key = self._key(path)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and (self.ttl is None or time.monotonic() - entry[1] < self.ttl):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], True
+            self.misses += 1
+
+        value = loader(path)
+        if value:
+            with self.lock:
+                self.entries[key] = (value, time.monotonic())
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return value, False
+
+
+def handle_request(process, line, out):
+    """
+    Run one request line through process(); returns (response dict, keep_running).
+    Streamed jobs write their records to `out` directly and return no response.
+    """
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("request must be a JSON object")
+    except ValueError as e:
+        return {"success": False, "error": f"Invalid request: {e}"}, True
+
+    op = request.get("op", "process")
+    if op == "ping":
+        return {"id": request.get("id"), "ok": True}, True
+    if op == "shutdown":
+        return {"id": request.get("id"), "ok": True}, False
+
+    missing = [field for field in REQUIRED_FIELDS if not request.get(field)]
+    if missing:
+        return {"id": request.get("id"), "success": False, "error": f"Missing fields: {', '.join(missing)}"}, True
+
+    args = [request[field] for field in REQUIRED_FIELDS]
+    start = time.perf_counter()
+    if request.get("stream"):
+        stream = ResultStream(out, request.get("id"))
+        try:
+            process(*args, stream=stream)
+        except Exception as e:
+            stream.finish({"success": False, "error": str(e)})
+        return None, True
+
+    try:
+        result = process(*args)
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+    result["id"] = request.get("id")
+    result["worker_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result, True
+
+
+def serve_lines(process, lines, out):
+    """Answer request lines until they run out or a shutdown request arrives"""
+    for line in lines:
+        if not line.strip():
+            continue
+        response, keep_running = handle_request(process, line, out)
+        if response is not None:
+            out.write(json.dumps(response) + "\n")
+            out.flush()
+        if not keep_running:
+            return False
+    return True
+
+
+def serve_stdin(process, stdin=None, stdout=None):
+    """Answer JSON-line requests from stdin until EOF or a shutdown request"""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    print(f"🟢 Worker ready (pid {os.getpid()}), reading jobs from stdin", file=sys.stderr)
+    serve_lines(process, stdin, stdout)
+
+
+def serve_socket(process, socket_path):
+    """Answer JSON-line requests on a Unix socket; each connection may send many jobs"""
+    import io
+    import socketserver
+    
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            lines = io.TextIOWrapper(self.rfile, encoding="utf-8")
+            out = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+            if not serve_lines(process, lines, out):
+                # shutdown() blocks until serve_forever returns, so call it off-thread
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            out.detach()
+
+    with socketserver.UnixStreamServer(socket_path, Handler) as server:
+        print(f"🟢 Worker ready (pid {os.getpid()}), listening on {socket_path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        finally:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+def run_worker(process, argv):
+    """Entry point for `<processor> --worker [--socket PATH]`"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Serve PDF processing jobs as JSON lines")
+    parser.add_argument("--worker", action="store_true", required=True)
+    parser.add_argument("--socket", help="Listen on this Unix socket instead of stdin/stdout")
+    args = parser.parse_args(argv)
+
+    if args.socket:
+        serve_socket(process, args.socket)
+    else:
+        serve_stdin(process)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+MinHash / LSH near-duplicate detection for generated questions.
+
+Each question's normalized stem and options are shingled and reduced to a
+MinHash signature (one-permutation hashing, so every shingle is hashed once).
+LSH banding then finds candidate duplicates with a few dict lookups instead
+of comparing against every question in the bank. The index can be persisted
+to JSON so duplicates are caught across runs too. Entries record the test
+they came from (`owner`): a test is never matched against its own entries
+from an earlier run, and those entries are replaced when the index is saved,
+so re-running a deterministic generator does not flag (or drop) everything.
+
+Usage (scan existing banks):
+    python question_dedup.py tmp/tests/*.json --threshold 0.8 [--index tmp/question_index.json]
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+
+SHINGLE_SIZE = 4
+# Offset added to values borrowed by empty bins during densification
+DENSIFY_OFFSET = 1 << 56
+
+
+def normalize_text(text):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    text = re.sub(r"[^a-z0-9\s]", " ", str(text).lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def question_shingles(question):
+    """Character shingles over the normalized stem plus sorted options"""
+    stem = normalize_text(question.get("question", ""))
+    options = " | ".join(sorted(normalize_text(o) for o in question.get("options", [])))
+    text = f"{stem} || {options}"
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+class QuestionIndex:
+    """LSH index of question MinHash signatures"""
+
+    def __init__(self, threshold=0.8, num_perm=64, bands=16, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.seed = seed
+        self.hash_key = str(seed).encode("utf-8")
+        self.buckets = {}
+        self.entries = []
+        # Entries below this id were loaded from a saved index (earlier runs)
+        self.previous_count = 0
+        self.owners_seen = set()
+
+    def signature(self, question):
+        """MinHash signature of a question dict"""
+        bins = [None] * self.num_perm
+        for shingle in question_shingles(question):
+            h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8, key=self.hash_key).digest(), "big")
+            b = h % self.num_perm
+            value = h >> 8
+            if bins[b] is None or value < bins[b]:
+                bins[b] = value
+
+        # Rotation densification: empty bins borrow from the next filled bin
+        signature = list(bins)
+        for i in range(self.num_perm):
+            if signature[i] is None:
+                for step in range(1, self.num_perm):
+                    borrowed = bins[(i + step) % self.num_perm]
+                    if borrowed is not None:
+                        signature[i] = borrowed + step * DENSIFY_OFFSET
+                        break
+        return signature
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield f"{band}:" + ",".join(map(str, signature[start:start + self.rows]))
+
+    @staticmethod
+    def similarity(sig_a, sig_b):
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+    def find_duplicate(self, question, signature=None, owner=None):
+        """
+        Return (entry, similarity) for the closest indexed near-duplicate, or
+        None; entries `owner` left in earlier runs are not considered
+        """
+        signature = signature or self.signature(question)
+        best = None
+        seen = set()
+        for key in self._band_keys(signature):
+            for entry_id in self.buckets.get(key, ()):
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+                entry = self.entries[entry_id]
+                if owner is not None and entry_id < self.previous_count and entry.get("owner") == owner:
+                    continue
+                score = self.similarity(signature, entry["signature"])
+                if score >= self.threshold and (best is None or score > best[1]):
+                    best = (entry, score)
+        return best
+
+    def add(self, question, source=None, signature=None, owner=None):
+        """Index a question unconditionally"""
+        signature = signature or self.signature(question)
+        entry_id = len(self.entries)
+        self.entries.append({"question": question.get("question", ""), "source": source, "signature": signature, "owner": owner})
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, []).append(entry_id)
+
+    def check_and_add(self, question, source=None, owner=None):
+        """
+        Return the near-duplicate match if there is one, otherwise index the
+        question; `owner` (e.g. the test title) identifies the test across runs
+        """
+        if owner is not None:
+            self.owners_seen.add(owner)
+        signature = self.signature(question)
+        match = self.find_duplicate(question, signature, owner)
+        if match is None:
+            self.add(question, source, signature, owner)
+        return match
+
+    def save(self, path):
+        """Persist the index so later runs also catch repeats"""
+        # Earlier runs' entries for tests indexed again in this run are superseded
+        entries = [
+            entry for entry_id, entry in enumerate(self.entries)
+            if entry_id >= self.previous_count or entry.get("owner") not in self.owners_seen
+        ]
+        data = {
+            "threshold": self.threshold, "num_perm": self.num_perm,
+            "bands": self.bands, "seed": self.seed, "entries": entries,
+        }
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path, threshold=None):
+        """Load a saved index, or return an empty one if the file does not exist"""
+        path = Path(path)
+        if not path.exists():
+            return cls(threshold=threshold or 0.8)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(threshold or data["threshold"], data["num_perm"], data["bands"], data["seed"])
+        for entry in data["entries"]:
+            index.add({"question": entry["question"]}, entry["source"], entry["signature"], entry.get("owner"))
+        index.previous_count = len(index.entries)
+        return index
+
+
+def iter_tests(data):
+    """Yield tests from a bank file (list, {"tests": [...]}, or a single test)"""
+    if isinstance(data, dict) and "tests" in data:
+        data = data["tests"]
+    if isinstance(data, dict):
+        data = [data]
+    for test in data:
+        if isinstance(test, dict) and isinstance(test.get("questions"), list):
+            yield test
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate questions across test banks")
+    parser.add_argument("files", nargs="+", help="Test JSON files to scan")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Estimated Jaccard similarity to flag")
+    parser.add_argument("--index", help="Persistent index file to check against and update")
+    args = parser.parse_args()
+
+    index = QuestionIndex.load(args.index, args.threshold) if args.index else QuestionIndex(args.threshold)
+    total = 0
+    duplicates = 0
+
+    for file_path in args.files:
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for test in iter_tests(data):
+            for i, question in enumerate(test["questions"]):
+                total += 1
+                source = f"{Path(file_path).name} :: {test.get('title', '?')} #{i + 1}"
+                match = index.check_and_add(question, source, owner=f"{Path(file_path).name} :: {test.get('title', '?')}")
+                if match:
+                    duplicates += 1
+                    entry, score = match
+                    print(f"⚠️  {source}\n    ≈ {entry['source']} ({score:.0%}): {question.get('question', '')[:80]}")
+
+    print(f"\n📊 Scanned {total} questions: {duplicates} near-duplicates (threshold {args.threshold:.0%})")
+    if args.index:
+        index.save(args.index)
+        print(f"📁 Index saved to: {args.index}")
+    sys.exit(1 if duplicates else 0)
+
+
+if __name__ == "__main__":
+    main()
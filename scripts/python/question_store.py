@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Normalized question store for exporting test banks.
+
+Exporters normally serialize every test's full questions array, so a
+question shared by several tests (the template generators reuse them
+heavily) is stored and sent once per test. This export stores each distinct
+question once, keyed by a content hash, plus a test_questions list of
+(test, position, question hash):
+
+    {"questions": {"<hash>": {...}}, "tests": [{..., "question_hashes": [...], "question_ids": [...]}]}
+
+Question ids are per test, so they stay out of the shared body and are
+merged back in when tests.questions is rebuilt.
+
+The SQL loader sends that compact form and rebuilds tests.questions inside
+Postgres (the app still reads the JSONB column). It also keeps the
+`questions` and `test_questions` tables for reuse queries. As with
+export_sql.py, `--schema no-board` targets a tests table without a board column:
+
+    python question_store.py all_class3_math_tests.json --json tmp/question_store.json --sql tmp/question_store.sql
+    psql "$DATABASE_URL" -f tmp/question_store.sql
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+from delta_import import QUESTION_FIELDS
+from export_sql import SCHEMAS
+from json_stream import iter_tests_stream
+from sql_statements import DEFAULT_BATCH_SIZE, insert_rows
+
+SCHEMA_SQL = """\
+CREATE TABLE IF NOT EXISTS questions (
+  hash TEXT PRIMARY KEY,
+  body JSONB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS test_questions (
+  test_id UUID NOT NULL REFERENCES tests(id) ON DELETE CASCADE,
+  position INTEGER NOT NULL,
+  question_hash TEXT NOT NULL REFERENCES questions(hash),
+  PRIMARY KEY (test_id, position)
+);
+CREATE TEMP TABLE import_tests (
+  ord INTEGER PRIMARY KEY,
+  id UUID NOT NULL DEFAULT gen_random_uuid(),
+  title TEXT, description TEXT, subject TEXT, grade TEXT, board TEXT, timelimit INTEGER
+) ON COMMIT DROP;
+CREATE TEMP TABLE import_test_questions (
+  test_ord INTEGER, position INTEGER, question_hash TEXT, question_id JSONB
+) ON COMMIT DROP;"""
+
+# {columns}/{t_columns}: the tests columns of the target schema, except questions
+ASSEMBLE_SQL = """\
+-- Rebuild each test's questions array from the shared store (tests without questions get [])
+INSERT INTO tests (id, {columns}, questions)
+SELECT t.id, {t_columns},
+       COALESCE(jsonb_agg(CASE WHEN tq.question_id IS NULL THEN q.body
+                               ELSE q.body || jsonb_build_object('id', tq.question_id) END
+                          ORDER BY tq.position) FILTER (WHERE q.hash IS NOT NULL), '[]'::jsonb)
+FROM import_tests t
+LEFT JOIN import_test_questions tq ON tq.test_ord = t.ord
+LEFT JOIN questions q ON q.hash = tq.question_hash
+GROUP BY t.ord, t.id, {t_columns}
+ORDER BY t.ord;
+
+INSERT INTO test_questions (test_id, position, question_hash)
+SELECT t.id, tq.position, tq.question_hash
+FROM import_tests t JOIN import_test_questions tq ON tq.test_ord = t.ord;"""
+
+
+def question_body(question):
+    """Question content without per-test fields such as the id"""
+    return {field: question[field] for field in QUESTION_FIELDS if question.get(field) is not None}
+
+
+def question_hash(question):
+    """128-bit content hash of a question"""
+    canonical = json.dumps(question_body(question), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def build_store(tests, default_board="CBSE"):
+    """Normalize tests into {"questions": {hash: body}, "tests": [...]} plus reuse stats"""
+    questions = {}
+    store_tests = []
+    references = 0
+    for test in tests:
+        hashes = []
+        ids = []
+        for question in test.get("questions", []):
+            digest = question_hash(question)
+            questions.setdefault(digest, question_body(question))
+            hashes.append(digest)
+            ids.append(question.get("id"))
+        references += len(hashes)
+        store_tests.append({
+            "title": test["title"],
+            "description": test.get("description", ""),
+            "subject": test["subject"],
+            "grade": test["grade"],
+            "board": test.get("board") or default_board,
+            "timelimit": test.get("duration", test.get("timelimit")),
+            "question_hashes": hashes,
+            "question_ids": ids,
+        })
+    stats = {"tests": len(store_tests), "question_refs": references, "unique_questions": len(questions)}
+    return {"questions": questions, "tests": store_tests}, stats
+
+
+def store_sql_lines(store, batch_size=DEFAULT_BATCH_SIZE, schema="board"):
+    """Compact loader: shared questions once, tests and links by reference"""
+    columns = [column for column in SCHEMAS[schema] if column != "questions"]
+    yield "BEGIN;"
+    yield SCHEMA_SQL
+    yield ""
+    yield f"-- {len(store['questions'])} distinct questions"
+    question_rows = ((digest, json.dumps(body, ensure_ascii=False)) for digest, body in store["questions"].items())
+    yield from insert_rows("questions", ("hash", "body"), question_rows, batch_size, " ON CONFLICT (hash) DO NOTHING")
+    yield ""
+    yield f"-- {len(store['tests'])} tests"
+    test_rows = (
+        (ord_, t["title"], t["description"], t["subject"], t["grade"], t["board"], t["timelimit"])
+        for ord_, t in enumerate(store["tests"])
+    )
+    yield from insert_rows("import_tests", ("ord", "title", "description", "subject", "grade", "board", "timelimit"), test_rows, batch_size)
+    link_rows = (
+        (ord_, position, digest, None if question_id is None else json.dumps(question_id, ensure_ascii=False))
+        for ord_, t in enumerate(store["tests"])
+        for position, (digest, question_id) in enumerate(zip(t["question_hashes"], t["question_ids"]))
+    )
+    # Link rows are tiny, so they go in larger batches
+    yield from insert_rows("import_test_questions", ("test_ord", "position", "question_hash", "question_id"), link_rows, batch_size * 10)
+    yield ""
+    yield ASSEMBLE_SQL.format(columns=", ".join(columns), t_columns=", ".join(f"t.{column}" for column in columns))
+    yield ""
+    yield "COMMIT;"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export test banks as a normalized, deduplicated question store")
+    parser.add_argument("files", nargs="+", help="Test bank JSON files")
+    parser.add_argument("--json", help="Write the normalized store as JSON here")
+    parser.add_argument("--sql", help="Write the compact SQL loader here")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per INSERT statement")
+    parser.add_argument("--schema", choices=sorted(SCHEMAS), default="board", help="Target tests table with or without a board column")
+    parser.add_argument("--default-board", default="CBSE", help="Board for tests that do not set one")
+    args = parser.parse_args()
+
+    def all_tests():
+        for path in args.files:
+            yield from iter_tests_stream(path)
+
+    # Size of the questions payload the per-test exporters would send
+    naive_bytes = 0
+
+    def measured(tests):
+        nonlocal naive_bytes
+        for test in tests:
+            naive_bytes += len(json.dumps(test["questions"]).encode("utf-8"))
+            yield test
+
+    store, stats = build_store(measured(all_tests()), args.default_board)
+    store_bytes = (sum(len(json.dumps(body).encode("utf-8")) for body in store["questions"].values())
+                   + sum(len(digest) + 4 for t in store["tests"] for digest in t["question_hashes"]))
+
+    reuse = stats["question_refs"] / max(stats["unique_questions"], 1)
+    print(f"📊 {stats['tests']} tests, {stats['question_refs']} question references, "
+          f"{stats['unique_questions']} distinct questions ({reuse:.2f}x reuse)")
+    print(f"📦 Question payload: {naive_bytes / 1024:.0f} KB per-test vs {store_bytes / 1024:.0f} KB normalized")
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or ".", exist_ok=True)
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(store, f, ensure_ascii=False)
+        print(f"📁 Store saved to: {args.json}")
+    if args.sql:
+        os.makedirs(os.path.dirname(args.sql) or ".", exist_ok=True)
+        with open(args.sql, 'w', encoding='utf-8') as f:
+            for line in store_sql_lines(store, args.batch_size, args.schema):
+                f.write(line + "\n")
+        print(f"📁 Loader saved to: {args.sql} (run with psql -f or the SQL editor)")
+    if not args.json and not args.sql:
+        print("ℹ️  Pass --json and/or --sql to write the store", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
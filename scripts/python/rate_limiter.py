@@ -0,0 +1,193 @@
+"""
+Rate-limit-aware scheduling for bulk LLM generation.
+
+Each provider gets a token bucket for requests/minute and tokens/minute plus
+an AIMD concurrency window: every successful call grows the window by about
+one slot per round trip, every 429 halves it and pauses the whole provider for
+the Retry-After period. Bulk runs therefore settle at the highest sustainable
+rate instead of either crawling serially or triggering error storms.
+"""
+
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Conservative defaults; override per run with --rpm / --tpm
+DEFAULT_LIMITS = {
+    "openai": {"rpm": 500, "tpm": 30000},
+    "gemini": {"rpm": 10, "tpm": 250000},
+    "ollama": {"rpm": 0, "tpm": 0},  # local, unlimited
+}
+
+
+class TokenBucket:
+    """Refilling bucket whose capacity is a per-minute allowance (0 = unlimited)"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute or 0)
+        self.tokens = self.capacity
+        self.rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, amount):
+        """Take `amount` tokens now and return how many seconds to wait before using them"""
+        if not self.capacity:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= min(amount, self.capacity)
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class ProviderLimiter:
+    """Request/token buckets plus an AIMD concurrency window for one provider"""
+
+    def __init__(self, name, rpm=0, tpm=0, initial_concurrency=2, max_concurrency=16):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.limit = float(initial_concurrency)
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.cond = threading.Condition()
+        self.stats = {"calls": 0, "rate_limited": 0, "failed": 0, "peak_concurrency": 0}
+
+    def acquire(self, estimated_tokens):
+        """Block until a concurrency slot and rate budget are available"""
+        with self.cond:
+            while self.in_flight >= max(1, int(self.limit)):
+                self.cond.wait()
+            self.in_flight += 1
+            self.stats["peak_concurrency"] = max(self.stats["peak_concurrency"], self.in_flight)
+
+        wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if wait > 0:
+            time.sleep(wait)
+        # Honour any provider-wide pause set by a 429 while we were queued
+        while True:
+            with self.cond:
+                pause = self.blocked_until - time.monotonic()
+            if pause <= 0:
+                break
+            time.sleep(pause)
+
+    def release(self, success, retry_after=None):
+        """Return the slot and adapt the window: additive increase, multiplicative decrease"""
+        with self.cond:
+            self.in_flight -= 1
+            self.stats["calls"] += 1
+            if retry_after is not None:
+                self.stats["rate_limited"] += 1
+                self.limit = max(1.0, self.limit / 2)
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            elif success:
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            else:
+                self.stats["failed"] += 1
+            self.cond.notify_all()
+
+
+def _exception_chain(exc):
+    while exc is not None:
+        yield exc
+        exc = exc.__cause__ or exc.__context__
+
+
+def rate_limit_retry_after(exc):
+    """
+    Return the Retry-After delay (seconds, 0.0 if unspecified) when `exc` is a
+    rate-limit error from requests, openai or google SDKs, otherwise None.
+    """
+    for err in _exception_chain(exc):
+        response = getattr(err, "response", None)
+        status = (getattr(err, "status_code", None) or getattr(err, "http_status", None)
+                  or getattr(response, "status_code", None))
+        name = type(err).__name__
+        if status == 429 or name in ("RateLimitError", "ResourceExhausted", "TooManyRequests") or re.search(r"\b429\b", str(err)):
+            headers = getattr(err, "headers", None) or getattr(response, "headers", None) or {}
+            value = headers.get("Retry-After") or headers.get("retry-after")
+            if value is None:
+                match = re.search(r"retry[ _-]?(?:after|delay)\D*(\d+(?:\.\d+)?)", str(err), re.IGNORECASE)
+                value = match.group(1) if match else None
+            try:
+                return float(value) if value is not None else 0.0
+            except ValueError:
+                return 0.0
+    return None
+
+
+class RateLimitedScheduler:
+    """Run jobs across providers at the maximum sustainable rate"""
+
+    def __init__(self, limits=None, max_concurrency=16, max_retries=5, base_backoff=2.0):
+        self.limits = dict(DEFAULT_LIMITS)
+        self.limits.update(limits or {})
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.providers = {}
+        self.lock = threading.Lock()
+
+    def limiter(self, provider):
+        """Return (creating on first use) the limiter for a provider"""
+        with self.lock:
+            if provider not in self.providers:
+                config = self.limits.get(provider, {})
+                self.providers[provider] = ProviderLimiter(
+                    provider, config.get("rpm", 0), config.get("tpm", 0),
+                    max_concurrency=self.max_concurrency
+                )
+            return self.providers[provider]
+
+    def call(self, provider, fn, *args, estimated_tokens=1, **kwargs):
+        """Call fn under the provider's limits, retrying 429s after Retry-After / backoff"""
+        limiter = self.limiter(provider)
+        for attempt in range(self.max_retries + 1):
+            limiter.acquire(estimated_tokens)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                retry_after = rate_limit_retry_after(e)
+                if retry_after is None or attempt == self.max_retries:
+                    limiter.release(False)
+                    raise
+                # Exponential backoff with jitter when the provider gave no Retry-After
+                delay = retry_after or self.base_backoff * (2 ** attempt) * (0.5 + random.random())
+                limiter.release(False, retry_after=delay)
+                print(f"⏳ {provider} rate limited; window now {int(limiter.limit)}, retrying in {delay:.1f}s", file=sys.stderr)
+                continue
+            limiter.release(True)
+            return result
+
+    def run(self, jobs, on_done=None):
+        """
+        Run jobs given as dicts with provider, fn, args and optional
+        estimated_tokens. Returns (result, error) pairs in job order.
+        """
+        def run_job(job):
+            try:
+                result = self.call(job["provider"], job["fn"], *job.get("args", ()),
+                                   estimated_tokens=job.get("estimated_tokens", 1))
+                outcome = (result, None)
+            except Exception as e:
+                outcome = (None, e)
+            if on_done:
+                on_done(job, *outcome)
+            return outcome
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            return list(executor.map(run_job, jobs))
+
+    def stats(self):
+        """Per-provider call counts, 429s and final concurrency window"""
+        return {
+            name: dict(limiter.stats, concurrency_window=round(limiter.limit, 2))
+            for name, limiter in self.providers.items()
+        }
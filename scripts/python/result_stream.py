@@ -0,0 +1,86 @@
+"""
+Opt-in NDJSON output for the PDF processors.
+
+With `--stream` (or `"stream": true` on a worker job) a processor writes one
+JSON record per line as work progresses instead of a single result object
+at the end:
+
+    {"type": "stage", "stage": "extract_text", "status": "started"}
+    {"type": "stage", "stage": "extract_text", "status": "done", "duration_ms": 812.4}
+    {"type": "test", "index": 0, "concept": "Addition", "test": {...}}
+    {"type": "metrics", "metrics": {...}}
+    {"type": "summary", "success": true, "testCount": 3, "concepts": [...], ...}
+
+Tests are written as soon as they are generated and not kept afterwards, so
+callers can save and show them early and memory stays bounded per test. The
+summary record is always last; on failure it carries "success": false and
+"error". Worker jobs add their "id" to every record.
+"""
+
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ResultStream:
+    """NDJSON event writer; a stream with no output does nothing"""
+
+    def __init__(self, out=None, job_id=None):
+        self.out = out
+        self.job_id = job_id
+        self.enabled = out is not None
+        self.test_count = 0
+        self.lock = threading.Lock()
+
+    def emit(self, record_type, **fields):
+        """Write one record and flush it so the reader sees it immediately"""
+        if not self.enabled:
+            return
+        record = {"type": record_type}
+        if self.job_id is not None:
+            record["id"] = self.job_id
+        record.update(fields)
+        line = json.dumps(record) + "\n"
+        with self.lock:
+            self.out.write(line)
+            self.out.flush()
+
+    @contextmanager
+    def stage(self, name, **attrs):
+        """Emit started/done (or failed) records around a pipeline stage"""
+        self.emit("stage", stage=name, status="started", **attrs)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.emit("stage", stage=name, status="failed", error=str(e), **attrs)
+            raise
+        self.emit("stage", stage=name, status="done", duration_ms=round((time.perf_counter() - start) * 1000, 1), **attrs)
+
+    def test(self, concept, test):
+        """Emit one completed test"""
+        self.emit("test", index=self.test_count, concept=concept, test=test)
+        self.test_count += 1
+
+    def finish(self, result):
+        """Emit the metrics and the closing summary for a processor result"""
+        if not self.enabled:
+            return
+        summary = {key: value for key, value in result.items() if key not in ("tests", "metrics")}
+        summary["testCount"] = self.test_count
+        if "metrics" in result:
+            self.emit("metrics", metrics=result["metrics"])
+        self.emit("summary", **summary)
+
+
+def split_stream_flag(argv):
+    """Remove --stream from the CLI arguments; returns (args, streaming)"""
+    args = [arg for arg in argv if arg != "--stream"]
+    return args, len(args) != len(argv)
+
+
+def stdout_stream():
+    """ResultStream writing to stdout (progress logs stay on stderr)"""
+    return ResultStream(sys.stdout)
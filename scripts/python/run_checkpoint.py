@@ -0,0 +1,120 @@
+"""
+Atomic per-chapter checkpoints and a run manifest for multi-chapter generators.
+
+Each finished chapter (and optionally each finished concept) is written to its
+own JSON file via write-to-temp + rename; finished chapters are recorded in
+`manifest.json`. A restarted run loads completed work from the checkpoint
+directory and resumes at the first unfinished chapter or concept instead of
+starting over. Concept files never touch the manifest, so chapter workers in
+separate processes can checkpoint concepts without racing each other. Once a
+run has written its output, `finish()` removes the checkpoint directory so the
+next run starts from scratch; only interrupted runs resume. Chapters whose
+source PDF does not exist are recorded as skipped and do not hold a run open.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+
+def atomic_write_json(path, data, indent=2):
+    """Write JSON to a temp file in the same directory, then rename over the target"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class RunCheckpoint:
+    """Checkpoint directory for one generator run"""
+
+    def __init__(self, run_name, checkpoint_root="tmp/checkpoints", fresh=False):
+        self.run_dir = Path(checkpoint_root) / run_name
+        self.manifest_path = self.run_dir / "manifest.json"
+        if fresh:
+            # Chapter and concept files, the manifest and any temp files left by a crash
+            shutil.rmtree(self.run_dir, ignore_errors=True)
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+
+        if fresh or not self.manifest_path.exists():
+            self.manifest = {"run": run_name, "created": time.time(), "chapters": {}}
+            self._save_manifest()
+        else:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+
+    def _save_manifest(self):
+        self.manifest["updated"] = time.time()
+        atomic_write_json(self.manifest_path, self.manifest)
+
+    def _chapter_file(self, chapter_num):
+        return self.run_dir / f"chapter_{chapter_num}.json"
+
+    def _concept_file(self, chapter_num, concept_index):
+        return self.run_dir / f"chapter_{chapter_num}_concept_{concept_index}.json"
+
+    def is_chapter_done(self, chapter_num):
+        """True if the chapter finished in a previous (or this) run"""
+        entry = self.manifest["chapters"].get(str(chapter_num))
+        return bool(entry and entry["status"] == "done" and self._chapter_file(chapter_num).exists())
+
+    def load_chapter(self, chapter_num):
+        """Tests saved for a completed chapter"""
+        with open(self._chapter_file(chapter_num), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_chapter(self, chapter_num, tests):
+        """Checkpoint a completed chapter and drop its per-concept files"""
+        atomic_write_json(self._chapter_file(chapter_num), tests)
+        for concept_file in self.run_dir.glob(f"chapter_{chapter_num}_concept_*.json"):
+            concept_file.unlink()
+        self.manifest["chapters"][str(chapter_num)] = {"status": "done", "tests": len(tests), "finished": time.time()}
+        self._save_manifest()
+
+    def skip_chapter(self, chapter_num, reason):
+        """Record a chapter that cannot be generated (e.g. its PDF is missing); it is retried next run"""
+        self.manifest["chapters"][str(chapter_num)] = {"status": "skipped", "reason": reason, "finished": time.time()}
+        self._save_manifest()
+
+    def load_concept(self, chapter_num, concept_index):
+        """Test saved for a completed concept of an unfinished chapter, or None"""
+        concept_file = self._concept_file(chapter_num, concept_index)
+        if not concept_file.exists():
+            return None
+        with open(concept_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_concept(self, chapter_num, concept_index, test):
+        """Checkpoint one finished concept inside a chapter"""
+        atomic_write_json(self._concept_file(chapter_num, concept_index), test)
+
+    def finish(self, chapters):
+        """
+        Remove the checkpoints once every one of `chapters` is done or skipped
+        and the output is written; returns False (keeping them to resume) otherwise
+        """
+        def finished(chapter_num):
+            entry = self.manifest["chapters"].get(str(chapter_num))
+            return self.is_chapter_done(chapter_num) or bool(entry and entry["status"] == "skipped")
+
+        if not all(finished(chapter_num) for chapter_num in chapters):
+            return False
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+        return True
+
+    def summary(self):
+        """Counts of completed chapters for progress messages"""
+        done = sum(1 for entry in self.manifest["chapters"].values() if entry["status"] == "done")
+        return f"{done} chapters already complete in {self.run_dir}"
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Compiled schema validation for tests and questions.
+
+The test and question structure is defined once below (TEST_SCHEMA,
+QUESTION_SCHEMA) as a small JSON Schema subset. At import it is compiled to
+straight-line Python (type checks, `in` tests and length comparisons, no
+per-field function calls), so validating a bank costs about as much as the
+inline checks it replaces. Error paths are only rendered when something is
+wrong:
+
+    tests[12].questions[3].correctAnswer: must be less than len(options) (4)
+
+Supported keywords: type (a name or a list of names), properties, required,
+items, minItems, maxItems, minLength, minimum, plus two cross-field ones:
+requiredOneOf (at least one of the listed fields must be present) and
+indexOf ({"correctAnswer": "options"}: the integer must index the list).
+
+    python schema_validator.py tmp/tests backups/tests_backup_*.json --jobs 0
+    python -m doctest schema_validator.py -v   # run the docstring examples
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+QUESTION_SCHEMA = {
+    "type": "object",
+    "required": ["question", "options", "correctAnswer", "explanation"],
+    "properties": {
+        "question": {"type": "string", "minLength": 1},
+        # Models often answer maths questions with bare numbers ("options": [12, 15, 18, 21])
+        "options": {"type": "array", "minItems": 4, "maxItems": 4, "items": {"type": ["string", "number"]}},
+        "correctAnswer": {"type": "integer", "minimum": 0},
+        "explanation": {"type": "string"},
+        "image": {"type": ["string", "null"]},
+    },
+    "indexOf": {"correctAnswer": "options"},
+}
+
+TEST_SCHEMA = {
+    "type": "object",
+    "required": ["title", "subject", "grade", "questions"],
+    "requiredOneOf": [["duration", "timelimit"]],
+    "properties": {
+        "title": {"type": "string", "minLength": 1},
+        "description": {"type": ["string", "null"]},
+        "subject": {"type": "string", "minLength": 1},
+        "grade": {"type": "string", "minLength": 1},
+        "board": {"type": ["string", "null"]},
+        "duration": {"type": "integer", "minimum": 1},
+        "timelimit": {"type": "integer", "minimum": 1},
+        "questions": {"type": "array", "minItems": 1, "items": QUESTION_SCHEMA},
+    },
+}
+
+_TYPE_CHECKS = {
+    "object": "type({v}) is dict",
+    "array": "type({v}) is list",
+    "string": "type({v}) is str",
+    "integer": "type({v}) is int",
+    "number": "type({v}) in (int, float)",
+    "boolean": "type({v}) is bool",
+    "null": "{v} is None",
+}
+
+_MISSING = object()
+
+
+def _path(base, key):
+    """Render a (base, key) location chain as tests[3].questions[1].options"""
+    parts = []
+    while key is not None:
+        parts.append(f"[{key}]" if type(key) is int else f".{key}")
+        base, key = base if base is not None else (None, None)
+    return "".join(reversed(parts)).lstrip(".") or "$"
+
+
+def _type_name(value):
+    return {dict: "object", list: "array", str: "string", int: "integer", float: "number",
+            bool: "boolean", type(None): "null"}.get(type(value), type(value).__name__)
+
+
+class _Compiler:
+    """Turns a schema into the source of one validator function per object schema"""
+
+    def __init__(self):
+        self.functions = []
+        self.names = {}
+
+    def object_function(self, schema):
+        if id(schema) in self.names:
+            return self.names[id(schema)]
+        name = f"_v{len(self.names)}"
+        self.names[id(schema)] = name
+        lines = [f"def {name}(value, base, key, errors):"]
+        self.emit_type(lines, schema, "value", "base", "key", 1, returns=True)
+        lines.append("    here = (base, key)")
+        required = set(schema.get("required", ()))
+        for prop, sub in schema.get("properties", {}).items():
+            var = f"p_{prop}"
+            lines.append(f"    {var} = value.get({prop!r}, _MISSING)")
+            if prop in required:
+                lines.append(f"    if {var} is _MISSING:")
+                lines.append(f"        errors.append((_path(here, {prop!r}), 'is required'))")
+                lines.append("    else:")
+            else:
+                lines.append(f"    if {var} is not _MISSING:")
+            self.emit_check(lines, sub, var, "here", repr(prop), 2)
+        for prop in required - set(schema.get("properties", {})):
+            lines.append(f"    if {prop!r} not in value:")
+            lines.append(f"        errors.append((_path(here, {prop!r}), 'is required'))")
+        for group in schema.get("requiredOneOf", ()):
+            condition = " and ".join(f"{prop!r} not in value" for prop in group)
+            lines.append(f"    if {condition}:")
+            lines.append(f"        errors.append((_path(base, key), {'requires one of ' + ', '.join(group)!r}))")
+        for prop, target in schema.get("indexOf", {}).items():
+            var, target_var = f"p_{prop}", f"p_{target}"
+            lines.append(f"    if type({var}) is int and type({target_var}) is list and {var} >= len({target_var}):")
+            lines.append(f"        errors.append((_path(here, {prop!r}), 'must be less than len({target}) (%d)' % len({target_var})))")
+        self.functions.append("\n".join(lines))
+        return name
+
+    def emit_type(self, lines, schema, var, base, key, depth, returns=False):
+        """Type check; on failure record the error and skip the remaining checks"""
+        types = schema.get("type")
+        if types is None:
+            return
+        types = [types] if isinstance(types, str) else types
+        condition = " or ".join(_TYPE_CHECKS[t].format(v=var) for t in types)
+        pad = "    " * depth
+        lines.append(f"{pad}if not ({condition}):")
+        lines.append(f"{pad}    errors.append((_path({base}, {key}), {'expected ' + ' or '.join(types) + ', got '!r} + _type_name({var})))")
+        if returns:
+            lines.append(f"{pad}    return")
+
+    def emit_check(self, lines, schema, var, base, key, depth):
+        """Inline checks for `var` at location (base, key); objects get their own function"""
+        pad = "    " * depth
+        kind = schema.get("type")
+        if kind == "object":
+            lines.append(f"{pad}{self.object_function(schema)}({var}, {base}, {key}, errors)")
+            return
+        self.emit_type(lines, schema, var, base, key, depth)
+        nullable = isinstance(kind, list) and "null" in kind
+        guard = f"{pad}elif {var} is not None:" if nullable else f"{pad}else:"
+        body = []
+        inner = "    " * (depth + 1)
+        if "minLength" in schema:
+            body.append(f"{inner}if len({var}) < {schema['minLength']}:")
+            message = "must not be empty" if schema["minLength"] == 1 else f"must be at least {schema['minLength']} characters"
+            body.append(f"{inner}    errors.append((_path({base}, {key}), {message!r}))")
+        if "minimum" in schema:
+            body.append(f"{inner}if {var} < {schema['minimum']!r}:")
+            body.append(f"{inner}    errors.append((_path({base}, {key}), {'must be at least ' + str(schema['minimum'])!r}))")
+        if "minItems" in schema or "maxItems" in schema:
+            low, high = schema.get("minItems"), schema.get("maxItems")
+            if low == high:
+                message = f"must have exactly {low} items, got "
+                condition = f"len({var}) != {low}"
+            elif high is None:
+                message, condition = f"must have at least {low} items, got ", f"len({var}) < {low}"
+            elif low is None:
+                message, condition = f"must have at most {high} items, got ", f"len({var}) > {high}"
+            else:
+                message = f"must have {low}-{high} items, got "
+                condition = f"not {low} <= len({var}) <= {high}"
+            body.append(f"{inner}if {condition}:")
+            body.append(f"{inner}    errors.append((_path({base}, {key}), {message!r} + str(len({var}))))")
+        if "items" in schema:
+            index = f"i{depth}"
+            item = f"item{depth}"
+            location = f"({base}, {key})"
+            body.append(f"{inner}for {index}, {item} in enumerate({var}):")
+            item_lines = []
+            self.emit_check(item_lines, schema["items"], item, location, index, depth + 2)
+            body.extend(item_lines)
+        if body:
+            if kind is None:
+                lines.extend(line[4:] for line in body)
+            else:
+                lines.append(guard)
+                lines.extend(body)
+
+
+def compile_schema(schema, name="validate"):
+    """
+    Compile an object schema into validate(value, base=None, key=None) -> [(path, message)];
+    `base`/`key` prefix the error paths (e.g. key="tests" or an index)
+    """
+    compiler = _Compiler()
+    entry = compiler.object_function(schema)
+    source = "\n\n".join(compiler.functions)
+    namespace = {"_MISSING": _MISSING, "_path": _path, "_type_name": _type_name}
+    exec(compile(source, f"<schema {name}>", "exec"), namespace)
+    check = namespace[entry]
+
+    def validate(value, base=None, key=None):
+        errors = []
+        check(value, base, key, errors)
+        return errors
+
+    validate.__name__ = name
+    validate.source = source
+    return validate
+
+
+validate_test = compile_schema(TEST_SCHEMA, "validate_test")
+validate_question = compile_schema(QUESTION_SCHEMA, "validate_question")
+
+
+def valid_questions(questions):
+    """
+    Questions that pass QUESTION_SCHEMA, in order (for filtering LLM output)
+
+    >>> question = {"question": "6 x 3 = ?", "options": [12, 15, 18, 21], "correctAnswer": 2, "explanation": ""}
+    >>> valid_questions([question, dict(question, options=["12", "15", "18", True])]) == [question]
+    True
+    """
+    if not isinstance(questions, list):
+        return []
+    return [q for q in questions if not validate_question(q)]
+
+
+def check_tests(tests, source="tests"):
+    """Yield tests unchanged, raising ValueError at the first invalid one (for exporters)"""
+    for index, test in enumerate(tests):
+        errors = validate_test(test, (None, source), index)
+        if errors:
+            path, message = errors[0]
+            more = f" (+{len(errors) - 1} more)" if len(errors) > 1 else ""
+            raise ValueError(f"{path}: {message}{more}")
+        yield test
+
+
+def locate_tests(data):
+    """
+    (tests, base) for a bank or backup file: a list, {"tests": [...]},
+    {"data": {"tests": [...]}} (full backup), {"table": "tests", "data": [...]}
+    or a single test. None when the file holds no tests (profiles, results, ...).
+    """
+    if isinstance(data, list):
+        looks_like_tests = not data or any(isinstance(item, dict) and ("questions" in item or "title" in item) for item in data)
+        return (data, None) if looks_like_tests else None
+    if not isinstance(data, dict):
+        return None
+    if "tests" in data:
+        return data["tests"], (None, "tests")
+    inner = data.get("data")
+    if isinstance(inner, dict) and "tests" in inner:
+        return inner["tests"], ((None, "data"), "tests")
+    if data.get("table") == "tests" and isinstance(inner, list):
+        return inner, (None, "data")
+    if "questions" in data:
+        return data, None
+    return None
+
+
+def validate_data(data):
+    """Validate a loaded bank; returns (tests, questions, errors), or None if it holds no tests"""
+    located = locate_tests(data)
+    if located is None:
+        return None
+    items, base = located
+    if isinstance(items, dict):
+        questions = len(items["questions"]) if isinstance(items.get("questions"), list) else 0
+        return 1, questions, validate_test(items)
+    if not isinstance(items, list):
+        return 0, 0, [(_path(*base), "expected array, got " + _type_name(items))]
+
+    errors = []
+    questions = 0
+    for index, test in enumerate(items):
+        errors.extend(validate_test(test, base, index))
+        if isinstance(test, dict) and isinstance(test.get("questions"), list):
+            questions += len(test["questions"])
+    return len(items), questions, errors
+
+
+def validate_file(path, max_errors=None):
+    """Validate one JSON file; returns a summary dict (only the first `max_errors` errors are kept)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        return {"file": str(path), "tests": 0, "questions": 0, "error_count": 1, "errors": [("$", f"unreadable: {e}")]}
+    result = validate_data(data)
+    if result is None:
+        return {"file": str(path), "tests": 0, "questions": 0, "error_count": 0, "errors": [], "skipped": True}
+    tests, questions, errors = result
+    return {"file": str(path), "tests": tests, "questions": questions, "error_count": len(errors),
+            "errors": errors[:max_errors] if max_errors else errors}
+
+
+def collect_files(paths):
+    """Expand directories to the *.json files under them"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.rglob("*.json")))
+        else:
+            files.append(path)
+    return files
+
+
+def validate_files(files, jobs=1, max_errors=None):
+    """Yield validate_file summaries, in input order, across `jobs` processes"""
+    jobs = (os.cpu_count() or 1) if jobs == 0 else jobs
+    if jobs <= 1 or len(files) <= 1:
+        for path in files:
+            yield validate_file(path, max_errors)
+        return
+    from concurrent.futures import ProcessPoolExecutor  # keeps `import schema_validator` light for the processors
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(files))) as executor:
+        yield from executor.map(validate_file, files, [max_errors] * len(files), chunksize=4)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validate test bank JSON files against the test/question schema")
+    parser.add_argument("paths", nargs="+", help="JSON files or directories (searched recursively for *.json)")
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="Files to validate in parallel (0 = one per CPU)")
+    parser.add_argument("--max-errors", type=int, default=50, help="Errors to report per file (0 = all)")
+    parser.add_argument("--json", action="store_true", help="Print one JSON summary per file instead of text")
+    parser.add_argument("--show-source", action="store_true", help="Print the compiled validator source and exit")
+    args = parser.parse_args()
+
+    if args.show_source:
+        print(validate_test.source)
+        return
+
+    files = collect_files(args.paths)
+    start = time.perf_counter()
+    totals = {"files": 0, "tests": 0, "questions": 0, "errors": 0, "bad_files": 0, "skipped": 0}
+    for summary in validate_files(files, args.jobs, args.max_errors or None):
+        if summary.get("skipped"):
+            totals["skipped"] += 1
+            if args.json:
+                print(json.dumps(summary))
+            continue
+        totals["files"] += 1
+        totals["tests"] += summary["tests"]
+        totals["questions"] += summary["questions"]
+        totals["errors"] += summary["error_count"]
+        totals["bad_files"] += bool(summary["error_count"])
+        if args.json:
+            print(json.dumps({**summary, "errors": [{"path": p, "message": m} for p, m in summary["errors"]]}))
+        elif summary["errors"]:
+            print(f"❌ {summary['file']}: {summary['error_count']} errors")
+            for path, message in summary["errors"]:
+                print(f"   {path}: {message}")
+            if summary["error_count"] > len(summary["errors"]):
+                print(f"   ... {summary['error_count'] - len(summary['errors'])} more")
+    elapsed = time.perf_counter() - start
+
+    rate = totals["questions"] / elapsed * 60 if elapsed else 0
+    print(f"{'✅' if not totals['errors'] else '⚠️ '} {totals['files']} files, {totals['tests']} tests, "
+          f"{totals['questions']} questions checked in {elapsed:.2f}s ({rate:,.0f} questions/min); "
+          f"{totals['errors']} errors in {totals['bad_files']} files"
+          + (f" ({totals['skipped']} files without tests skipped)" if totals["skipped"] else ""), file=sys.stderr)
+    sys.exit(1 if totals["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
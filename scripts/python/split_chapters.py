@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 
-from PIL import Image
+import argparse
 from pathlib import Path
 import sys
 
+from chapter_pdf_builder import build_chapter_pdfs
+from chapter_pool import add_jobs_argument
+
 # EDIT THIS: Define your chapter page ranges based on page 10 (Table of Contents)
 # Format: "Chapter Name": (start_page, end_page)
 CHAPTERS = {
@@ -21,62 +24,11 @@ CHAPTERS = {
     "Chapter 12: Data Handling": (231, 248),
 }
 
-def create_chapter_pdf(pages_dir, chapter_name, start_page, end_page, output_dir):
-    """Create a PDF from a range of pages"""
-    pages_dir = Path(pages_dir)
-    output_dir = Path(output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Sanitize chapter name for filename
-    safe_name = chapter_name.replace(":", "-").replace(" ", "_")
-    output_pdf = output_dir / f"{safe_name}.pdf"
-    
-    print(f"\nCreating: {chapter_name}")
-    print(f"  Pages: {start_page} to {end_page}")
-    
-    # Collect images for this chapter
-    images = []
-    missing_pages = []
-    
-    for page_num in range(start_page, end_page + 1):
-        page_file = pages_dir / f"page_{page_num:03d}.jpg"
-        
-        if not page_file.exists():
-            missing_pages.append(page_num)
-            continue
-        
-        try:
-            img = Image.open(page_file)
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            images.append(img)
-        except Exception as e:
-            print(f"  ✗ Error loading page {page_num}: {e}")
-    
-    if missing_pages:
-        print(f"  ⚠ Missing pages: {missing_pages}")
-    
-    if not images:
-        print(f"  ✗ No images found for this chapter")
-        return False
-    
-    # Create PDF
-    try:
-        images[0].save(
-            output_pdf,
-            save_all=True,
-            append_images=images[1:] if len(images) > 1 else [],
-            resolution=100.0,
-            quality=95,
-            optimize=True
-        )
-        print(f"  ✓ Created: {output_pdf.name} ({len(images)} pages)")
-        return True
-    except Exception as e:
-        print(f"  ✗ Error creating PDF: {e}")
-        return False
-
 def main():
+    parser = argparse.ArgumentParser(description="Split the downloaded Class 5 pages into chapter PDFs")
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+    
     pages_dir = "./tmp/viva_class5_pages"
     output_dir = "./tmp/class5_chapters"
     
@@ -94,11 +46,9 @@ def main():
     
     print("\n" + "=" * 70)
     
-    # Create PDF for each chapter
-    success_count = 0
-    for chapter_name, (start_page, end_page) in CHAPTERS.items():
-        if create_chapter_pdf(pages_dir, chapter_name, start_page, end_page, output_dir):
-            success_count += 1
+    # Create the chapter PDFs in parallel; pages shared by chapters are prepared once
+    results = build_chapter_pdfs(pages_dir, CHAPTERS, output_dir, args.jobs)
+    success_count = sum(1 for result in results if result["output"])
     
     print("\n" + "=" * 70)
     print(f"\n✓ Successfully created {success_count}/{len(CHAPTERS)} chapter PDFs")
@@ -0,0 +1,110 @@
+"""
+Shared statement builders for the SQL exporters.
+
+Instead of one INSERT per test, tests are written as multi-row INSERTs of
+`batch_size` rows each, or as a PostgreSQL `COPY ... FROM STDIN` block that
+psql loads in a single statement:
+
+    psql "$DATABASE_URL" -f import_grade4_math_tests.copy.sql
+
+The Supabase SQL editor cannot run COPY FROM STDIN; use the INSERT format
+(the default) there.
+"""
+
+import json
+
+TEST_COLUMNS = ("title", "description", "subject", "grade", "board", "timelimit", "questions")
+TEST_COLUMNS_NO_BOARD = ("title", "description", "subject", "grade", "timelimit", "questions")
+
+DEFAULT_BATCH_SIZE = 100
+
+
+def test_values(test, columns, board=None):
+    """Column values for one test, in `columns` order; `board` overrides the test's own"""
+    minutes = test.get("duration", test.get("timelimit"))
+    values = {
+        "title": test["title"],
+        "description": test.get("description", ""),
+        "subject": test["subject"],
+        "grade": test["grade"],
+        "board": board if board is not None else test.get("board"),
+        "timelimit": minutes,
+        "duration": minutes,
+        "questions": json.dumps(test["questions"]),
+    }
+    return [values[column] for column in columns]
+
+
+def sql_literal(value):
+    """Render a Python value as a SQL literal"""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def insert_statements(tests, columns, batch_size=DEFAULT_BATCH_SIZE, table="tests", board=None):
+    """Yield multi-row INSERT statements of at most batch_size rows"""
+    batch_size = max(1, batch_size)
+    header = f"INSERT INTO {table} ({', '.join(columns)}) VALUES"
+    batch = []
+    first = 1
+    for i, test in enumerate(tests, 1):
+        batch.append("  (" + ", ".join(sql_literal(v) for v in test_values(test, columns, board)) + ")")
+        if len(batch) == batch_size:
+            yield f"-- Tests {first}-{i}\n{header}\n" + ",\n".join(batch) + ";"
+            batch = []
+            first = i + 1
+    if batch:
+        yield f"-- Tests {first}-{first + len(batch) - 1}\n{header}\n" + ",\n".join(batch) + ";"
+
+
+def insert_rows(table, columns, rows, batch_size=DEFAULT_BATCH_SIZE, suffix=""):
+    """Yield multi-row INSERT statements for plain value rows; `suffix` goes before the ';'"""
+    batch_size = max(1, batch_size)
+    header = f"INSERT INTO {table} ({', '.join(columns)}) VALUES"
+    batch = []
+    for row in rows:
+        batch.append("  (" + ", ".join(sql_literal(v) for v in row) + ")")
+        if len(batch) == batch_size:
+            yield f"{header}\n" + ",\n".join(batch) + suffix + ";"
+            batch = []
+    if batch:
+        yield f"{header}\n" + ",\n".join(batch) + suffix + ";"
+
+
+def copy_escape(value):
+    """Escape a value for COPY text format"""
+    if value is None:
+        return "\\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def copy_lines(tests, columns, table="tests", board=None):
+    """Yield the lines of a `COPY ... FROM STDIN` block, terminated by \\."""
+    yield f"COPY {table} ({', '.join(columns)}) FROM STDIN;"
+    for test in tests:
+        yield "\t".join(copy_escape(v) for v in test_values(test, columns, board))
+    yield "\\."
+
+
+def export_lines(tests, columns, fmt="insert", batch_size=DEFAULT_BATCH_SIZE, board=None):
+    """Body lines for the chosen output format ("insert" or "copy")"""
+    if fmt == "copy":
+        yield from copy_lines(tests, columns, board=board)
+        return
+    for statement in insert_statements(tests, columns, batch_size, board=board):
+        yield statement
+        yield ""
+
+
+def add_export_arguments(parser):
+    """Add --format and --batch-size to an exporter's argument parser"""
+    parser.add_argument("--format", choices=("insert", "copy"), default="insert",
+                        help="Multi-row INSERTs (SQL editor) or a COPY FROM STDIN block (psql)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Rows per INSERT statement")
@@ -0,0 +1,141 @@
+"""
+Structured latency, token and cost telemetry for the PDF processors.
+
+Processors time their stages with `metrics.span(...)` and wrap every provider
+request in `metrics.call(...)`. `metrics.to_dict()` goes into the final JSON
+under a `metrics` key, and `write_metrics_log()` appends the same record as a
+JSON line to $PROCESSOR_METRICS_LOG when that variable is set.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Estimated USD per 1K tokens (prompt, completion); unknown models cost 0
+MODEL_PRICING = {
+    "gpt-4": (0.03, 0.06),
+    "gemini-2.5-flash": (0.0003, 0.0025),
+    "llama2": (0.0, 0.0),
+}
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """Estimated USD cost of one call from the pricing table"""
+    prompt_price, completion_price = MODEL_PRICING.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000.0
+
+
+def openai_usage(response):
+    """(prompt, completion) token counts from an OpenAI chat completion"""
+    usage = getattr(response, "usage", None) or {}
+    get = usage.get if isinstance(usage, dict) else lambda key, default=0: getattr(usage, key, default)
+    return get("prompt_tokens", 0) or 0, get("completion_tokens", 0) or 0
+
+
+def ollama_usage(result):
+    """(prompt, completion) token counts from an Ollama /api/generate response"""
+    return result.get("prompt_eval_count", 0) or 0, result.get("eval_count", 0) or 0
+
+
+def gemini_usage(response):
+    """(prompt, completion) token counts from a Gemini generate_content response"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return 0, 0
+    return getattr(usage, "prompt_token_count", 0) or 0, getattr(usage, "candidates_token_count", 0) or 0
+
+
+class Telemetry:
+    """Collects stage spans and per-call provider records for one processor run"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Start a fresh run (used by long-lived callers between jobs)"""
+        with self.lock:
+            self.started_at = time.time()
+            self.origin = time.perf_counter()
+            self.spans = []
+            self.calls = []
+
+    def _offset_ms(self, moment):
+        return round((moment - self.origin) * 1000, 1)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """
+        Time a pipeline stage such as extraction or analysis. The yielded
+        dict takes extra attributes, e.g. cache_hit for FileCache lookups.
+        """
+        record = dict(attrs, name=name)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            end = time.perf_counter()
+            record["start_ms"] = self._offset_ms(start)
+            record["duration_ms"] = round((end - start) * 1000, 1)
+            with self.lock:
+                self.spans.append(record)
+
+    @contextmanager
+    def call(self, provider, model, **attrs):
+        """
+        Time one provider request. The yielded dict can be filled with
+        prompt_tokens, completion_tokens, retries and cache_hit.
+        """
+        record = dict(prompt_tokens=0, completion_tokens=0, retries=0, cache_hit=False, ok=True)
+        record.update(attrs, provider=provider, model=model)
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record["ok"] = False
+            record["error"] = str(e)[:200]
+            raise
+        finally:
+            end = time.perf_counter()
+            record["start_ms"] = self._offset_ms(start)
+            record["latency_ms"] = round((end - start) * 1000, 1)
+            record["cost_usd"] = round(estimate_cost(model, record["prompt_tokens"], record["completion_tokens"]), 6)
+            with self.lock:
+                self.calls.append(record)
+
+    def to_dict(self):
+        """Summary plus raw spans and calls, ready for json.dumps"""
+        with self.lock:
+            calls = list(self.calls)
+            spans = list(self.spans)
+        return {
+            "started_at": self.started_at,
+            "total_ms": self._offset_ms(time.perf_counter()),
+            "calls": len(calls),
+            "failed_calls": sum(1 for c in calls if not c["ok"]),
+            "retries": sum(c["retries"] for c in calls),
+            "cache_hits": sum(1 for record in calls + spans if record.get("cache_hit")),
+            "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+            "completion_tokens": sum(c["completion_tokens"] for c in calls),
+            "estimated_cost_usd": round(sum(c["cost_usd"] for c in calls), 6),
+            "spans": spans,
+            "call_log": calls,
+        }
+
+
+def write_metrics_log(record, path=None):
+    """Append one JSON line to the metrics log ($PROCESSOR_METRICS_LOG) if configured"""
+    path = path or os.getenv("PROCESSOR_METRICS_LOG")
+    if not path:
+        return
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError:
+        pass
+
+
+# Shared collector for the current processor run
+metrics = Telemetry()